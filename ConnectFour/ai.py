@@ -2,13 +2,84 @@
 # This file implements the AI for Connect Four using Minimax and alpha-beta pruning.
 
 import math
+import os
 import random
+import threading
 import time
-from board import ROWS, COLS, make_move, get_valid_moves, check_win, check_draw
+from collections import OrderedDict
+from searchcache import EXACT, LOWER, UPPER
+from board import ROWS, COLS, EMPTY, make_move, get_valid_moves, check_win, check_draw, position_key
 
 # global counters
 nodes_expanded = 0
 
+# stats of the most recent pick_best_move call
+last_search_stats = {}
+
+# Search limits. minimax calls _check_limits once nodes_expanded reaches _next_check,
+# so an unlimited search only pays for a single comparison per node.
+# The search state is module-global, so pick_best_move holds _search_lock.
+LIMIT_CHECK_INTERVAL = 128
+_next_check = math.inf
+_deadline = None
+_stop_event = None
+_node_limit = math.inf
+_search_lock = threading.RLock()
+
+# Principal variation collected during a search (multi_pv): while set, _pv_table[d] holds the
+# best line found below the node searched last at remaining depth d. None costs one check per node.
+_pv_table = None
+
+DEFAULT_DEPTH = 4
+MAX_DEPTH = ROWS * COLS
+
+WIN_SCORE = 10000000
+LOSS_SCORE = -1000000
+# bump whenever scores change (evaluation, terminal scores): it invalidates persistent search caches
+EVAL_VERSION = 1
+
+# optional endgame.EndgameDB probed by minimax, see load_endgame_db
+_endgame_db = None
+
+# optional EvalCache used for leaf evaluations, see enable_eval_cache
+_eval_cache = None
+DEFAULT_EVAL_CACHE_BYTES = 64 * 1024 * 1024
+
+# optional searchcache.SearchCache used as a transposition table, see enable_search_cache
+_search_cache = None
+
+# Batches with at least this many distinct positions are spread over worker processes
+BATCH_POOL_THRESHOLD = 8
+_batch_pool = None
+_batch_pool_config = None  # (workers, eval cache bytes) the pool was started with
+
+
+class SearchAborted(Exception):
+    """Raised inside minimax when a search limit is reached."""
+
+
+def _build_windows():
+    """Flat cell indices of every 4-cell window (horizontal, vertical, / and \\)."""
+    windows = []
+    for r in range(ROWS):
+        for c in range(COLS - 3):
+            windows.append(tuple(r * COLS + c + i for i in range(4)))
+    for c in range(COLS):
+        for r in range(ROWS - 3):
+            windows.append(tuple((r + i) * COLS + c for i in range(4)))
+    for r in range(3, ROWS):
+        for c in range(COLS - 3):
+            windows.append(tuple((r - i) * COLS + c + i for i in range(4)))
+    for r in range(ROWS - 3):
+        for c in range(COLS - 3):
+            windows.append(tuple((r + i) * COLS + c + i for i in range(4)))
+    return windows
+
+
+# precomputed once and shared by every search in the process
+WINDOWS = _build_windows()
+CENTER_CELLS = [r * COLS + COLS // 2 for r in range(ROWS)]
+
 
 def evaluate_window(window, piece):
     """
@@ -47,39 +118,93 @@ def score_position(board, piece):
     """
     Score the board for a given piece.
     """
-    score = 0
-    
+    cells = [cell for row in board for cell in row]
+
     # center column priority
-    center_array = [board[r][3] for r in range(6)]
-    score += center_array.count(piece) * 6
-    
-    # Horizontal
-    for r in range(ROWS):
-        row_array = board[r]
-        for c in range(COLS - 3):
-            window = row_array[c:c + 4]
-            score += evaluate_window(window, piece)
+    score = [cells[i] for i in CENTER_CELLS].count(piece) * 6
 
-    # Vertical
-    for c in range(COLS):
-        col_array = [board[r][c] for r in range(ROWS)]
-        for r in range(ROWS - 3):
-            window = col_array[r:r + 4]
-            score += evaluate_window(window, piece)
+    # Horizontal, vertical and both diagonals
+    for a, b, c, d in WINDOWS:
+        score += evaluate_window([cells[a], cells[b], cells[c], cells[d]], piece)
 
-    # Positive diagonal (/)
-    for r in range(3, ROWS):
-        for c in range(COLS - 3):
-            window = [board[r - i][c + i] for i in range(4)]
-            score += evaluate_window(window, piece)
+    return score
 
-    # Negative diagonal (\)
-    for r in range(ROWS - 3):
-        for c in range(COLS - 3):
-            window = [board[r + i][c + i] for i in range(4)]
-            score += evaluate_window(window, piece)
+class EvalCache:
+    """
+    Bounded LRU cache of score_position results keyed by position and piece.
+    It only caches static evaluations, so it helps fixed-depth searches too, and
+    it lives across searches so consecutive moves of a game reuse it.
+    """
+    # measured size of one OrderedDict entry with an int key and int value
+    ENTRY_BYTES = 160
 
-    return score
+    def __init__(self, max_bytes=DEFAULT_EVAL_CACHE_BYTES):
+        self.entries = OrderedDict()
+        self.max_entries = max(1, max_bytes // self.ENTRY_BYTES)
+        self.hits = 0
+        self.misses = 0
+
+    def score(self, board, piece):
+        key = (position_key(board) << 2) | piece
+        entries = self.entries
+        value = entries.get(key)
+        if value is not None:
+            entries.move_to_end(key)
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = score_position(board, piece)
+        entries[key] = value
+        if len(entries) > self.max_entries:
+            entries.popitem(last=False)
+        return value
+
+    def memory_bytes(self):
+        return len(self.entries) * self.ENTRY_BYTES
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+def enable_eval_cache(max_bytes=DEFAULT_EVAL_CACHE_BYTES):
+    """Cache leaf evaluations in a new EvalCache holding at most about max_bytes."""
+    global _eval_cache
+    _eval_cache = EvalCache(max_bytes)
+    return _eval_cache
+
+def disable_eval_cache():
+    global _eval_cache
+    _eval_cache = None
+
+def enable_search_cache(path):
+    """
+    Reuse and extend the persistent search cache at `path` (an sqlite file).
+    Moves and scores stay the same; only subtrees already searched are skipped.
+    It is bypassed while an endgame database is loaded, whose scores differ.
+    """
+    global _search_cache
+    from searchcache import SearchCache
+    disable_search_cache()
+    _search_cache = SearchCache(path, EVAL_VERSION)
+    return _search_cache
+
+def disable_search_cache():
+    """Write out pending entries and stop using the persistent search cache."""
+    global _search_cache
+    if _search_cache is not None:
+        _search_cache.close()
+    _search_cache = None
+
+def _store_search(key, piece, maximizingPlayer, depth, alpha, beta, move, value):
+    """Save a finished subtree; alpha and beta are the window it was searched with."""
+    if value <= alpha:
+        bound = UPPER
+    elif value >= beta:
+        bound = LOWER
+    else:
+        bound = EXACT
+    _search_cache.store(key, piece, maximizingPlayer, depth, bound, value, move)
 
 def minimax(board, depth, alpha, beta, maximizingPlayer, piece):
     """
@@ -88,10 +213,12 @@ def minimax(board, depth, alpha, beta, maximizingPlayer, piece):
     """
     global nodes_expanded
     nodes_expanded += 1
+    if nodes_expanded >= _next_check:
+        _check_limits()
     
     valid_moves = get_valid_moves(board)
-    WIN_SCORE = 10000000
-    LOSS_SCORE = -1000000
+    if _pv_table is not None:
+        _pv_table[depth] = []
     
     # terminal check
     if check_win(board, piece):
@@ -100,9 +227,25 @@ def minimax(board, depth, alpha, beta, maximizingPlayer, piece):
         return (None, LOSS_SCORE + (6 - depth))
     if check_draw(board):
         return (None, 0)
+    if _endgame_db is not None:
+        exact = _probe_endgame(board, depth, maximizingPlayer, piece)
+        if exact is not None:
+            return exact
     if depth == 0:
+        if _eval_cache is not None:
+            return (None, _eval_cache.score(board, piece))
         return (None, score_position(board, piece))
 
+    cache_key = None
+    if _search_cache is not None and _endgame_db is None:
+        cache_key = position_key(board)
+        cached = _search_cache.lookup(cache_key, piece, maximizingPlayer, depth)
+        if cached is not None:
+            bound, score, move = cached
+            if bound == EXACT or (bound == LOWER and score >= beta) or (bound == UPPER and score <= alpha):
+                return move, score
+        alpha0, beta0 = alpha, beta
+
     if maximizingPlayer:
         value = -math.inf
         best_move = valid_moves[0]
@@ -115,11 +258,15 @@ def minimax(board, depth, alpha, beta, maximizingPlayer, piece):
             if new_score > value:
                 value = new_score
                 best_move = col
+                if _pv_table is not None:
+                    _pv_table[depth] = [col] + _pv_table[depth - 1]
 
             alpha = max(alpha, value)
             if alpha >= beta:
                 break
 
+        if cache_key is not None:
+            _store_search(cache_key, piece, maximizingPlayer, depth, alpha0, beta0, best_move, value)
         return best_move, value
 
     else:
@@ -135,31 +282,343 @@ def minimax(board, depth, alpha, beta, maximizingPlayer, piece):
             if new_score < value:
                 value = new_score
                 best_move = col
+                if _pv_table is not None:
+                    _pv_table[depth] = [col] + _pv_table[depth - 1]
 
             beta = min(beta, value)
             if beta <= alpha:
                 break
 
+        if cache_key is not None:
+            _store_search(cache_key, piece, maximizingPlayer, depth, alpha0, beta0, best_move, value)
         return best_move, value
 
-def pick_best_move(board, piece, depth=4):
+def load_endgame_db(path):
+    """Probe the endgame database at `path` during searches (None switches it off)."""
+    global _endgame_db
+    if path is None:
+        _endgame_db = None
+    else:
+        from endgame import EndgameDB
+        _endgame_db = EndgameDB.load(path)
+    return _endgame_db
+
+def _endgame_score(value, depth, mover, piece):
+    """
+    Convert a database value (for `mover`) into a minimax score for `piece`, as if the
+    game-ending move had been found by searching `depth` plies from here.
+    """
+    if value == 0:
+        return 0
+    plies = abs(value)
+    if (value > 0) == (mover == piece):
+        return WIN_SCORE - (6 - (depth - plies))
+    return LOSS_SCORE + (6 - (depth - plies))
+
+def _probe_endgame(board, depth, maximizingPlayer, piece):
+    """(None, exact score) if the position is in the endgame database, else None."""
+    if sum(row.count(EMPTY) for row in board) > _endgame_db.max_empty:
+        return None
+    mover = piece if maximizingPlayer else (1 if piece == 2 else 2)
+    value = _endgame_db.probe(board, mover)
+    if value is None:
+        return None
+    return (None, _endgame_score(value, depth, mover, piece))
+
+def _endgame_move(board, piece, depth):
+    """Best root move from the database, used when the root itself was answered by a probe."""
+    opp = 1 if piece == 2 else 2
+    best_move, best_score = None, -math.inf
+    for col in get_valid_moves(board):
+        temp_b = [row[:] for row in board]
+        make_move(temp_b, col, piece)
+        if check_win(temp_b, piece):
+            return col
+        value = _endgame_db.probe(temp_b, opp)
+        if value is None:
+            score = 0 if check_draw(temp_b) else -math.inf
+        else:
+            score = _endgame_score(value, depth - 1, opp, piece)
+        if best_move is None or score > best_score:
+            best_move, best_score = col, score
+    return best_move
+
+def _check_limits():
+    """Abort the running search if it used up its node budget or time, or was asked to stop."""
+    global _next_check
+    if nodes_expanded >= _node_limit:
+        raise SearchAborted()
+    if _deadline is not None and time.time() >= _deadline:
+        raise SearchAborted()
+    if _stop_event is not None and _stop_event.is_set():
+        raise SearchAborted()
+    # never step over the node budget, so it cuts off at exactly the same node every time
+    _next_check = min(nodes_expanded + LIMIT_CHECK_INTERVAL, _node_limit)
+
+def _iterative_search(board, piece, max_depth):
+    """
+    Search depth 1, 2, ... max_depth until a limit aborts the search.
+    Returns (move, score, depth) of the deepest completed iteration.
+    """
+    global _next_check
+    # depth 1 always completes so there is a move to return
+    move, score = minimax(board, 1, -math.inf, math.inf, True, piece)
+    reached = 1
+    _next_check = nodes_expanded
+    try:
+        for d in range(2, max_depth + 1):
+            _check_limits()
+            move, score = minimax(board, d, -math.inf, math.inf, True, piece)
+            reached = d
+    except SearchAborted:
+        pass
+    return move, score, reached
+
+def pick_best_move(board, piece, depth=None, time_limit=None, stop_event=None, max_nodes=None):
     """
     Returns the best column for AI to move.
     Default depth=4 (medium difficulty)
+    With time_limit (seconds), max_nodes or stop_event (a threading.Event) the search
+    deepens one ply at a time up to depth and keeps the deepest fully searched result;
+    depth is uncapped when time_limit or max_nodes is given without it.
+    A max_nodes budget cuts off at the same node on every run, so the chosen move and
+    the cost per move are reproducible (depth 1 always completes, about 8 nodes).
+    Calls from different threads are serialized.
     """
     
     #col, _ = minimax(board, depth, -math.inf, math.inf, True, piece)
     #return col
     
+    global nodes_expanded, _next_check, _deadline, _stop_event, _node_limit
+    with _search_lock:
+        nodes_expanded = 0
+        cache = _eval_cache
+        if cache is not None:
+            hits, misses = cache.hits, cache.misses
+        
+        start = time.time()
+        if time_limit is None and stop_event is None and max_nodes is None:
+            depth = DEFAULT_DEPTH if depth is None else depth
+            move, score = minimax(board, depth, -math.inf, math.inf, True, piece)
+            reached = depth
+        else:
+            if depth is None:
+                depth = DEFAULT_DEPTH if time_limit is None and max_nodes is None else MAX_DEPTH
+            _deadline = None if time_limit is None else start + time_limit
+            _stop_event = stop_event
+            _node_limit = math.inf if max_nodes is None else max_nodes
+            try:
+                move, score, reached = _iterative_search(board, piece, depth)
+            finally:
+                _deadline = None
+                _stop_event = None
+                _node_limit = math.inf
+                _next_check = math.inf
+        if move is None and _endgame_db is not None and get_valid_moves(board):
+            move = _endgame_move(board, piece, reached)
+        end = time.time()
+        
+        time_taken = end - start
+        last_search_stats.clear()
+        last_search_stats.update({
+            "move": move,
+            "score": score,
+            "depth": reached,
+            "nodes": nodes_expanded,
+            "time": time_taken
+        })
+        if cache is not None:
+            lookups = (cache.hits - hits) + (cache.misses - misses)
+            last_search_stats.update({
+                "eval_cache_hits": cache.hits - hits,
+                "eval_cache_hit_rate": (cache.hits - hits) / lookups if lookups else 0.0,
+                "eval_cache_entries": len(cache.entries),
+                "eval_cache_bytes": cache.memory_bytes()
+            })
+        return move, time_taken, nodes_expanded
+
+def principal_variation(board, piece, depth, first_move=None):
+    """
+    Expected line of play for `piece` to move: the best move, the best reply to it, and so on,
+    each found by a search of the remaining depth. Does not touch nodes_expanded.
+    """
     global nodes_expanded
-    nodes_expanded = 0
-    
-    start = time.time()
-    move, _ = minimax(board, depth, -math.inf, math.inf, True, piece)
-    end = time.time()
-    
-    time_taken = end - start
-    return move, time_taken, nodes_expanded
+    with _search_lock:
+        saved = nodes_expanded
+        temp_b = [row[:] for row in board]
+        opp = 1 if piece == 2 else 2
+        maximizing = True
+        pv = []
+        try:
+            for ply in range(depth):
+                mover = piece if maximizing else opp
+                if ply == 0 and first_move is not None:
+                    col = first_move
+                else:
+                    col, _ = minimax(temp_b, depth - ply, -math.inf, math.inf, maximizing, piece)
+                    if col is None and _endgame_db is not None and get_valid_moves(temp_b):
+                        col = _endgame_move(temp_b, mover, depth - ply)
+                if col is None:
+                    break
+                make_move(temp_b, col, mover)
+                pv.append(col)
+                if check_win(temp_b, mover) or check_draw(temp_b):
+                    break
+                maximizing = not maximizing
+        finally:
+            nodes_expanded = saved
+        return pv
+
+def multi_pv(board, piece, depth=None, k=COLS, pv=True, stop_event=None):
+    """
+    Ranked analysis of the root moves from one search: a list of (col, score, pv) for the
+    best k moves, best first (ties keep column order, like pick_best_move).
+    Root moves share one alpha-beta window: once k moves have exact scores, every other
+    move only has to be proven no better than the k-th, so k=1 costs the same as
+    pick_best_move and k=COLS gives exact scores for every column.
+    The principal variations are collected during the same search, so they cost no extra
+    nodes; a line ends early where a position was answered by the persistent search cache
+    or the endgame database. pv=False returns just [col].
+    When stop_event is set the search ends early and ranks only the root moves searched
+    so far; last_search_stats["stopped"] is then True.
+    """
+    global nodes_expanded, _next_check, _stop_event, _pv_table
+    depth = DEFAULT_DEPTH if depth is None else depth
+    if depth < 1:
+        raise ValueError("multi_pv needs a depth of at least 1")
+    if k < 1:
+        raise ValueError("multi_pv needs k of at least 1")
+    opp = 1 if piece == 2 else 2
+    with _search_lock:
+        nodes_expanded = 1  # the root, as in minimax
+        start = time.time()
+        ranked = []  # (score, col, line) of exact results, best first
+        stopped = False
+        if not (check_win(board, piece) or check_win(board, opp) or check_draw(board)):
+            _stop_event = stop_event
+            _next_check = nodes_expanded if stop_event is not None else math.inf
+            if pv:
+                _pv_table = [[] for _ in range(depth)]
+            try:
+                for col in get_valid_moves(board):
+                    alpha = ranked[k - 1][0] if len(ranked) >= k else -math.inf
+                    temp_b = [row[:] for row in board]
+                    make_move(temp_b, col, piece)
+                    score = minimax(temp_b, depth - 1, alpha, math.inf, False, piece)[1]
+                    if score > alpha:
+                        # above alpha with an open beta the child's line is exact
+                        line = [col] + _pv_table[depth - 1] if pv else [col]
+                        i = 0
+                        while i < len(ranked) and ranked[i][0] >= score:
+                            i += 1
+                        ranked.insert(i, (score, col, line))
+                        del ranked[k:]
+            except SearchAborted:
+                stopped = True
+            finally:
+                _stop_event = None
+                _next_check = math.inf
+                _pv_table = None
+        nodes = nodes_expanded
+        time_taken = time.time() - start
+        last_search_stats.clear()
+        last_search_stats.update({
+            "move": ranked[0][1] if ranked else None,
+            "score": ranked[0][0] if ranked else None,
+            "depth": depth,
+            "nodes": nodes,
+            "time": time_taken,
+            "stopped": stopped
+        })
+        return [(col, score, line) for score, col, line in ranked]
+
+def search_position(board, piece, depth=None, time_limit=None, max_nodes=None):
+    """
+    Search one position like pick_best_move and return a copy of its last_search_stats.
+    New persistent search cache entries are written before returning, so it is safe to
+    call from pool workers, which may never reach a clean exit.
+    """
+    pick_best_move(board, piece, depth=depth, time_limit=time_limit, max_nodes=max_nodes)
+    if _search_cache is not None:
+        _search_cache.flush()
+    return dict(last_search_stats)
+
+def _search_job(job):
+    """Worker entry point for pick_best_moves: returns the stats of one search."""
+    return search_position(*job)
+
+def _init_batch_worker(eval_cache_bytes):
+    """Pool initializer: each worker keeps one EvalCache for every batch it serves."""
+    if eval_cache_bytes:
+        enable_eval_cache(eval_cache_bytes)
+    else:
+        disable_eval_cache()
+
+def _get_batch_pool(workers, eval_cache_bytes):
+    """Return the shared worker pool, (re)creating it if the size or cache size changed."""
+    global _batch_pool, _batch_pool_config
+    if _batch_pool is None or _batch_pool_config != (workers, eval_cache_bytes):
+        # imported here: multiprocessing noticeably slows down importing ai
+        from concurrent.futures import ProcessPoolExecutor
+        shutdown_batch_pool()
+        _batch_pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                                          initargs=(eval_cache_bytes,))
+        _batch_pool_config = (workers, eval_cache_bytes)
+    return _batch_pool
+
+def shutdown_batch_pool():
+    """Stop the worker processes kept alive between pick_best_moves calls."""
+    global _batch_pool, _batch_pool_config
+    if _batch_pool is not None:
+        _batch_pool.shutdown()
+    _batch_pool = None
+    _batch_pool_config = None
+
+def pick_best_moves(boards, pieces, depth=None, time_limit=None, workers=None, max_nodes=None,
+                    eval_cache_bytes=DEFAULT_EVAL_CACHE_BYTES):
+    """
+    Analyze many positions in one call.
+    pieces is either one piece for every board or a list matching boards.
+    Identical positions are searched once, and the searches share an EvalCache of
+    eval_cache_bytes (0 for none): the one enabled in this process if there is one,
+    otherwise one for the batch, or one per worker process that lives as long as the pool.
+    Large batches run on a worker pool that is kept alive between calls (workers=1 forces
+    a single process); consecutive positions go to the same worker, so positions from
+    one game share their leaves. Returns one dict per board, in input order, with move,
+    score, depth, nodes and time.
+    """
+    global _eval_cache
+    if isinstance(pieces, int):
+        pieces = [pieces] * len(boards)
+    if len(pieces) != len(boards):
+        raise ValueError("pieces must match boards")
+
+    jobs = {}
+    order = []
+    for board, piece in zip(boards, pieces):
+        key = (position_key(board), piece)
+        if key not in jobs:
+            jobs[key] = ([row[:] for row in board], piece, depth, time_limit, max_nodes)
+        order.append(key)
+
+    keys = list(jobs)
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(keys) >= BATCH_POOL_THRESHOLD:
+        pool = _get_batch_pool(workers, eval_cache_bytes)
+        chunksize = max(1, len(keys) // (workers * 4))
+        outputs = list(pool.map(_search_job, [jobs[k] for k in keys], chunksize=chunksize))
+    else:
+        with _search_lock:
+            saved = _eval_cache
+            if saved is None and eval_cache_bytes:
+                _eval_cache = EvalCache(eval_cache_bytes)
+            try:
+                outputs = [_search_job(jobs[k]) for k in keys]
+            finally:
+                _eval_cache = saved
+
+    results = dict(zip(keys, outputs))
+    return [dict(results[key]) for key in order]
 
 
 
@@ -0,0 +1,134 @@
+# analyze.py
+# Bulk position analysis: streams positions from a file or stdin and writes one CSV row per position
+#
+# Each input line is either a move string ("3342", one column per move, player 1 first) or a
+# 42-character board, top row first (". X O" or "0 1 2"). Blank lines and lines starting with
+# "#" are skipped. Output rows come out in input order as soon as they are ready; at most
+# --window positions are in flight, so memory stays flat however large the input is.
+#   python analyze.py positions.txt --depth 5 --workers 4 --out results.csv
+#   cat games.txt | python analyze.py --nodes 2000
+
+import argparse
+import csv
+import sys
+import time
+from collections import deque
+
+import ai
+from board import ROWS, COLS, PLAYER1, PLAYER2, parse_moves, parse_board_string, get_valid_moves, check_win
+
+FIELDS = ["line", "position", "to_move", "move", "score", "depth", "nodes", "time", "error"]
+
+
+def parse_position(text):
+    """(board, piece to move) from a move string or a board string."""
+    if len(text) == ROWS * COLS or not text.isdigit():
+        return parse_board_string(text)
+    return parse_moves(text)
+
+
+def analyze_line(job):
+    """Worker: analyze one input line. Returns its CSV row as a dict."""
+    line_no, text, limits = job
+    row = {"line": line_no, "position": text}
+    try:
+        board, piece = parse_position(text)
+    except ValueError as e:
+        row["error"] = str(e)
+        return row
+    row["to_move"] = piece
+    if check_win(board, PLAYER1) or check_win(board, PLAYER2):
+        row["error"] = "game is over"
+        return row
+    if not get_valid_moves(board):
+        row["error"] = "board is full"
+        return row
+    stats = ai.search_position(board, piece, **limits)
+    row.update({
+        "move": "" if stats["move"] is None else stats["move"],
+        "score": stats["score"],
+        "depth": stats["depth"],
+        "nodes": stats["nodes"],
+        "time": f"{stats['time']:.6f}"
+    })
+    return row
+
+
+def read_jobs(lines, limits):
+    for line_no, line in enumerate(lines, 1):
+        text = line.strip()
+        if text and not text.startswith("#"):
+            yield line_no, text, limits
+
+
+def _init_worker(cache_path):
+    if cache_path:
+        ai.enable_search_cache(cache_path)
+
+
+def analyze_stream(lines, limits, workers=1, window=None, cache_path=None):
+    """
+    Yield one result row per position in input order.
+    With workers > 1 positions are searched on a process pool; only `window`
+    (default 4 per worker) jobs are submitted ahead of the row being yielded.
+    """
+    jobs = read_jobs(lines, limits)
+    if workers <= 1:
+        _init_worker(cache_path)
+        try:
+            for job in jobs:
+                yield analyze_line(job)
+        finally:
+            if cache_path:
+                ai.disable_search_cache()
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+    window = window or workers * 4
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(cache_path,)) as pool:
+        pending = deque()
+        for job in jobs:
+            pending.append(pool.submit(analyze_line, job))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze a stream of Connect Four positions")
+    parser.add_argument("input", nargs="?", default="-", help="file of positions, - for stdin")
+    parser.add_argument("--out", default="-", help="CSV file to write, - for stdout")
+    parser.add_argument("--depth", type=int, help="search depth (default 4, or unlimited with --time/--nodes)")
+    parser.add_argument("--time", type=float, help="seconds per position")
+    parser.add_argument("--nodes", type=int, help="node budget per position")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--window", type=int, help="positions in flight (default 4 per worker)")
+    parser.add_argument("--cache", metavar="PATH", help="persistent search cache to use and extend")
+    args = parser.parse_args(argv)
+
+    limits = {"depth": args.depth, "time_limit": args.time, "max_nodes": args.nodes}
+    source = sys.stdin if args.input == "-" else open(args.input)
+    out = sys.stdout if args.out == "-" else open(args.out, "w", newline="")
+    start = time.time()
+    count = 0
+    try:
+        writer = csv.DictWriter(out, fieldnames=FIELDS)
+        writer.writeheader()
+        for row in analyze_stream(source, limits, args.workers, args.window, args.cache):
+            writer.writerow(row)
+            count += 1
+            if out is sys.stdout:
+                out.flush()
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.time() - start
+    print(f"Analyzed {count} positions in {elapsed:.1f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
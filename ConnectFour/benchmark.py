@@ -0,0 +1,313 @@
+# benchmark.py
+# Reproducible throughput benchmarks for the Connect Four engine
+# Measures pick_best_move, score_position and check_win on a fixed position corpus,
+# saves the results as a JSON baseline and compares later runs against it.
+# Node counts are deterministic and fail the run when they grow by 10%. Timings swing with
+# machine load, so they are compared as slowdowns (extra time per unit of work, whether the
+# metric is a rate or a time): flagged as "slower" past 25% and failing the run past 60%.
+# Only baselines taken on the same corpus and depths are compared.
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+from board import ROWS, COLS, create_board, make_move, get_valid_moves, check_win, check_draw
+from ai import pick_best_move, score_position
+from midgame_test import POSITIONS
+from searchcache import using_search_cache
+
+CORPUS_SEED = 3106
+CORPUS_SIZE = 24
+SEARCH_DEPTHS = (1, 2, 3, 4)
+DEFAULT_THRESHOLD = 0.10  # allowed relative growth of a node count before it counts as a regression
+TIME_WARN_THRESHOLD = 0.25  # slowdown of a timing metric that is flagged as "slower"
+TIME_THRESHOLD = 0.60  # slowdown that fails the run: above the run-to-run noise, below a 2x regression
+MIN_TIME = 0.2  # seconds each timing is measured over at least
+STARTUP_RUNS = 15  # interpreter starts per module, the median is reported
+STARTUP_TOLERANCE = 0.005  # seconds of extra startup that are flagged; relative changes of a few ms are noise
+
+# True when a larger value of the metric is better
+METRIC_DIRECTIONS = {
+    "nodes_per_sec": True,
+    "time_to_depth": False,
+    "nodes_to_depth": False,
+    "calls_per_sec": True,
+    "startup_sec": False,
+}
+# metrics that give the same value on every run, gated at the tighter node count threshold
+DETERMINISTIC_METRICS = ("nodes_to_depth",)
+# meta fields that must match for two runs to be comparable
+COMPARABLE_META = ("board", "corpus_seed", "corpus_size", "depths")
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# harness modules whose import time is tracked
+STARTUP_MODULES = ("midgame_test", "simulation")
+
+
+def generate_corpus(size=CORPUS_SIZE, seed=CORPUS_SEED):
+    """
+    Build a fixed list of positions by random play from the empty board.
+    The same seed always yields the same corpus, so runs stay comparable.
+    """
+    rng = random.Random(seed)
+    corpus = []
+    while len(corpus) < size:
+        board = create_board()
+        plies = rng.randint(4, 30)
+        piece = 1
+        for _ in range(plies):
+            make_move(board, rng.choice(get_valid_moves(board)), piece)
+            piece = 3 - piece
+            if check_win(board, 1) or check_win(board, 2) or check_draw(board):
+                break
+        else:
+            corpus.append({
+                "name": f"R{len(corpus):02d}_{plies}ply",
+                "board": board,
+                "next_to_move": piece
+            })
+    return corpus
+
+
+def benchmark_positions(corpus_size=CORPUS_SIZE):
+    """Midgame test positions followed by the generated corpus."""
+    return list(POSITIONS) + generate_corpus(corpus_size)
+
+
+def _time_per_run(run, repeat, min_time=MIN_TIME):
+    """
+    Seconds per call of run(). Each of `repeat` measurements calls it until at least
+    min_time has passed, so short runs are not dominated by timer and scheduler noise.
+    Returns the best measurement.
+    """
+    best = None
+    for _ in range(repeat):
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            run()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        per_run = elapsed / calls
+        if best is None or per_run < best:
+            best = per_run
+    return best
+
+
+def bench_search(positions, depths=SEARCH_DEPTHS, repeat=3):
+    """
+    Time pick_best_move at each depth over all positions.
+    Node counts come from one search per position; times are the best of `repeat`
+    measurements of the whole set, each at least MIN_TIME long.
+    """
+    def search_all(depth):
+        return [pick_best_move([row[:] for row in pos["board"]], pos["next_to_move"], depth=depth)[2]
+                for pos in positions]
+
+    results = {}
+    for depth in depths:
+        per_position = dict(zip((pos["name"] for pos in positions), search_all(depth)))
+        total_nodes = sum(per_position.values())
+        total_time = _time_per_run(lambda: search_all(depth), repeat)
+
+        results[f"depth_{depth}"] = {
+            "nodes_per_sec": total_nodes / total_time if total_time else 0,
+            "time_to_depth": total_time / len(positions),
+            "nodes_to_depth": total_nodes / len(positions),
+            "nodes_by_position": per_position
+        }
+    return results
+
+
+def _time_calls(func, args_list, repeat):
+    """Return calls/sec for calling func on every argument tuple."""
+    def run():
+        for args in args_list:
+            func(*args)
+
+    per_run = _time_per_run(run, repeat)
+    return len(args_list) / per_run if per_run else 0
+
+
+def bench_isolated(positions, loops=50, repeat=3):
+    """Throughput of score_position and check_win on their own."""
+    args_list = [(pos["board"], piece) for pos in positions for piece in (1, 2)] * loops
+    return {
+        "score_position": {"calls_per_sec": _time_calls(score_position, args_list, repeat)},
+        "check_win": {"calls_per_sec": _time_calls(check_win, args_list, repeat)}
+    }
+
+
+def bench_startup(modules=STARTUP_MODULES, runs=STARTUP_RUNS):
+    """
+    Wall time of a fresh interpreter importing each harness module, minus
+    the time of a bare interpreter start. Median of `runs` runs each.
+    """
+    def median_time(code):
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-c", code], check=True, cwd=HERE)
+            times.append(time.perf_counter() - start)
+        return statistics.median(times)
+
+    bare = median_time("pass")
+    return {f"startup_{name}": {"startup_sec": max(0.0, median_time(f"import {name}") - bare)}
+            for name in modules}
+
+
+def run_benchmarks(depths=SEARCH_DEPTHS, corpus_size=CORPUS_SIZE, repeat=3):
+    positions = benchmark_positions(corpus_size)
+    print(f"Benchmarking {len(positions)} positions, depths {list(depths)}")
+    results = {}
+    results.update(bench_search(positions, depths, repeat))
+    results.update(bench_isolated(positions, repeat=repeat))
+    results.update(bench_startup())
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "board": f"{ROWS}x{COLS}",
+            "corpus_seed": CORPUS_SEED,
+            "corpus_size": corpus_size,
+            "depths": list(depths),
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
+        },
+        "results": results
+    }
+
+
+def meta_mismatches(baseline_meta, current_meta):
+    """Names of the COMPARABLE_META fields that differ between two runs."""
+    return [name for name in COMPARABLE_META if baseline_meta.get(name) != current_meta.get(name)]
+
+
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD, time_threshold=TIME_THRESHOLD,
+                    warn_threshold=TIME_WARN_THRESHOLD):
+    """
+    Compare two result sets metric by metric.
+    Returns a list of (benchmark, metric, baseline_value, current_value, change, status).
+    Change is relative and signed so that a positive number always means "better".
+    Status is "REGRESSION" for a node count that grew past `threshold` or a timing whose
+    slowdown (base/cur - 1 for rates, cur/base - 1 for times) is past `time_threshold`,
+    "slower" for a slowdown past `warn_threshold` or a startup more than
+    STARTUP_TOLERANCE longer, otherwise "ok". Startup is never gated. Per-position node
+    counts are listed when they changed.
+    Raises ValueError when the runs used a different corpus or depths.
+    """
+    mismatched = meta_mismatches(baseline.get("meta", {}), current["meta"])
+    if mismatched:
+        raise ValueError(f"baseline differs in {', '.join(mismatched)}")
+    rows = []
+    for bench, metrics in current["results"].items():
+        base_metrics = baseline["results"].get(bench)
+        if base_metrics is None:
+            continue
+        for metric, higher_is_better in METRIC_DIRECTIONS.items():
+            if metric not in metrics or metric not in base_metrics:
+                continue
+            base, cur = base_metrics[metric], metrics[metric]
+            if not base:
+                continue
+            change = (cur - base) / base
+            if not higher_is_better:
+                change = -change
+            slowdown = (base / cur if higher_is_better else cur / base) - 1 if cur else math.inf
+            if metric in DETERMINISTIC_METRICS:
+                status = "REGRESSION" if change < -threshold else "ok"
+            elif metric == "startup_sec":
+                status = "slower" if cur - base > STARTUP_TOLERANCE else "ok"
+            elif slowdown > time_threshold:
+                status = "REGRESSION"
+            elif slowdown > warn_threshold:
+                status = "slower"
+            else:
+                status = "ok"
+            rows.append((bench, metric, base, cur, change, status))
+
+        base_nodes = base_metrics.get("nodes_by_position", {})
+        for name, cur in metrics.get("nodes_by_position", {}).items():
+            base = base_nodes.get(name)
+            if not base or cur == base:
+                continue
+            change = -(cur - base) / base
+            rows.append((bench, name, base, cur, change, "REGRESSION" if change < -threshold else "ok"))
+    return rows
+
+
+def print_results(results):
+    print("\n=== Benchmark Results ===")
+    for bench, metrics in results["results"].items():
+        summary = ", ".join(f"{k}: {v:.6g}" for k, v in metrics.items() if not isinstance(v, dict))
+        print(f"{bench}: {summary}")
+
+
+def print_comparison(rows, threshold, time_threshold):
+    print(f"\n=== Comparison against baseline (node counts {threshold*100:.0f}%, "
+          f"timings {time_threshold*100:.0f}%) ===")
+    for bench, metric, base, cur, change, status in rows:
+        print(f"{bench:>16} {metric:<15} {base:>14.6g} -> {cur:<14.6g} {change*100:+7.1f}%  {status}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Connect Four engine benchmarks")
+    parser.add_argument("--save", metavar="PATH", help="write results as a JSON baseline")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative node count growth that fails the run (default 0.10)")
+    parser.add_argument("--time-threshold", type=float, default=TIME_THRESHOLD,
+                        help="slowdown of a timing that fails the run (default 0.60)")
+    parser.add_argument("--max-depth", type=int, default=max(SEARCH_DEPTHS))
+    parser.add_argument("--corpus-size", type=int, default=CORPUS_SIZE)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--cache", metavar="PATH",
+                        help="search with a persistent search cache (measures a warm engine, "
+                             "so compare only against baselines taken the same way)")
+    args = parser.parse_args(argv)
+
+    depths = tuple(range(1, args.max_depth + 1))
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        # checked before the run: the results would not be comparable anyway
+        planned = {"board": f"{ROWS}x{COLS}", "corpus_seed": CORPUS_SEED,
+                   "corpus_size": args.corpus_size, "depths": list(depths)}
+        mismatched = meta_mismatches(baseline.get("meta", {}), planned)
+        if mismatched:
+            print(f"Baseline {args.baseline} was taken with a different {', '.join(mismatched)}; "
+                  f"rerun with the same --corpus-size and --max-depth or save a new baseline.")
+            return 2
+
+    with using_search_cache(args.cache):
+        results = run_benchmarks(depths, args.corpus_size, args.repeat)
+    print_results(results)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline saved to {args.save}")
+
+    if baseline is not None:
+        rows = compare_results(baseline, results, args.threshold, args.time_threshold)
+        print_comparison(rows, args.threshold, args.time_threshold)
+        if any(row[-1] == "REGRESSION" for row in rows):
+            print("\nPerformance regression detected.")
+            return 1
+        if any(row[-1] == "slower" for row in rows):
+            print("\nSome timings are slower; rerun on a quiet machine to confirm.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -69,3 +69,67 @@ def check_win(board, piece):
 def check_draw(board):
     """Check if the board is full (top row has no empty cells)."""
     return all(board[0][c] != EMPTY for c in range(COLS))
+
+def position_key(board):
+    """
+    Return a unique integer key for the position.
+    Each column takes 7 bits: a leading 1 followed by one bit per piece (bottom up).
+    """
+    key = 0
+    for c in range(COLS):
+        col_bits = 1
+        for r in reversed(range(ROWS)):
+            cell = board[r][c]
+            if cell == EMPTY:
+                break
+            col_bits = (col_bits << 1) | (cell == PLAYER2)
+        key = (key << 7) | col_bits
+    return key
+
+def parse_moves(moves):
+    """
+    Play a move string such as "3342" (one column digit per move, player 1 first) on an empty board.
+    Returns (board, piece to move). Raises ValueError for a bad column, a full column
+    or a move after the game has ended.
+    """
+    board = create_board()
+    piece = PLAYER1
+    over = False
+    for ch in moves:
+        if over:
+            raise ValueError(f"move {ch!r} played after the game ended")
+        if not ch.isdigit() or int(ch) >= COLS:
+            raise ValueError(f"invalid column {ch!r}")
+        col = int(ch)
+        if not is_valid_move(board, col):
+            raise ValueError(f"column {col} is full")
+        make_move(board, col, piece)
+        over = check_win(board, piece) or check_draw(board)
+        piece = PLAYER2 if piece == PLAYER1 else PLAYER1
+    return board, piece
+
+BOARD_CHARS = {".": EMPTY, "0": EMPTY, "X": PLAYER1, "x": PLAYER1, "1": PLAYER1,
+               "O": PLAYER2, "o": PLAYER2, "2": PLAYER2}
+
+def parse_board_string(text):
+    """
+    Read a board written as ROWS*COLS characters, top row first ("." or 0 empty,
+    X or 1 for player 1, O or 2 for player 2). Returns (board, piece to move);
+    player 1 moves when both have the same number of pieces.
+    Raises ValueError for unknown characters, floating pieces or impossible counts.
+    """
+    if len(text) != ROWS * COLS:
+        raise ValueError(f"expected {ROWS * COLS} characters, got {len(text)}")
+    try:
+        cells = [BOARD_CHARS[ch] for ch in text]
+    except KeyError as e:
+        raise ValueError(f"invalid cell {e.args[0]!r}") from None
+    board = [cells[r * COLS:(r + 1) * COLS] for r in range(ROWS)]
+    for r in range(ROWS - 1):
+        for c in range(COLS):
+            if board[r][c] != EMPTY and board[r + 1][c] == EMPTY:
+                raise ValueError(f"floating piece in column {c}")
+    ones, twos = cells.count(PLAYER1), cells.count(PLAYER2)
+    if ones - twos not in (0, 1):
+        raise ValueError(f"impossible piece counts ({ones} X, {twos} O)")
+    return board, PLAYER1 if ones == twos else PLAYER2
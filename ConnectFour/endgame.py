@@ -0,0 +1,241 @@
+# endgame.py
+# Endgame database: exact values of late positions, built offline and probed by minimax
+#
+# Building every legal position with N empty cells is far beyond reach even for small N,
+# so the builder takes entry positions from the workload (the midgame test positions and
+# positions reached by random playouts from them) and stores the exact value of every
+# position reachable from an entry once at most N cells are empty.
+#
+# Values are from the side to move: 0 = draw, +n = wins with its n-th move from here
+# counted in plies, -n = the opponent wins after n plies. Mirrored positions share an entry.
+#
+# File layout: header (magic, version, max_empty, count), then `count` sorted uint64 keys,
+# then `count` int8 values. Usage:
+#   python endgame.py build --max-empty 8 --out endgame.db
+#   then ai.load_endgame_db("endgame.db") before searching
+
+import argparse
+import random
+import struct
+import sys
+import time
+from array import array
+from bisect import bisect_left
+
+from board import EMPTY, create_board, make_move, undo_move, get_valid_moves, \
+    check_win, check_draw, position_key
+
+MAGIC = b"C4EG"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQ")
+DEFAULT_MAX_EMPTY = 8
+DEFAULT_PLAYOUTS = 200
+DEFAULT_PATH = "endgame.db"
+
+
+def empty_cells(board):
+    return sum(row.count(EMPTY) for row in board)
+
+
+def db_key(board, to_move):
+    """Key shared by a position and its mirror image, with the side to move in the low bit."""
+    key = min(position_key(board), position_key([row[::-1] for row in board]))
+    return (key << 1) | (to_move == 2)
+
+
+def value_rank(value):
+    """Order values from the mover's point of view: fast wins > slow wins > draw > slow losses > fast losses."""
+    if value > 0:
+        return 1000 - value
+    if value < 0:
+        return -1000 - value
+    return 0
+
+
+def child_value(value):
+    """Turn the value of a child (opponent to move) into the value of its parent move."""
+    if value > 0:
+        return -(value + 1)
+    if value < 0:
+        return -value + 1
+    return 0
+
+
+def solve(board, to_move, table):
+    """
+    Exact value of a non-terminal position for `to_move`, memoized in table.
+    Every position visited is stored, so table ends up holding the whole subtree.
+    """
+    key = db_key(board, to_move)
+    value = table.get(key)
+    if value is not None:
+        return value
+
+    opp = 1 if to_move == 2 else 2
+    best = None
+    for col in get_valid_moves(board):
+        make_move(board, col, to_move)
+        if check_win(board, to_move):
+            value = 1
+        elif check_draw(board):
+            value = 0
+        else:
+            value = child_value(solve(board, opp, table))
+        undo_move(board, col)
+        if best is None or value_rank(value) > value_rank(best):
+            best = value
+
+    table[key] = 0 if best is None else best
+    return table[key]
+
+
+def is_terminal(board):
+    return check_win(board, 1) or check_win(board, 2) or check_draw(board)
+
+
+def playout_move(board, piece, rng):
+    """
+    Random move that does not complete four if there is a choice.
+    Pure random games almost never last long enough to reach the endgame.
+    """
+    moves = get_valid_moves(board)
+    quiet = []
+    for col in moves:
+        make_move(board, col, piece)
+        if not check_win(board, piece):
+            quiet.append(col)
+        undo_move(board, col)
+    return rng.choice(quiet or moves)
+
+
+def collect_entries(seeds, max_empty, playouts, seed=0):
+    """
+    Entry positions with at most max_empty empty cells: the seeds that already qualify,
+    plus the first qualifying position of `playouts` playouts from each seed.
+    """
+    rng = random.Random(seed)
+    entries = {}
+    for start_board, start_piece in seeds:
+        if is_terminal(start_board):
+            continue
+        if empty_cells(start_board) <= max_empty:
+            entries[db_key(start_board, start_piece)] = ([row[:] for row in start_board], start_piece)
+            continue
+        for _ in range(playouts):
+            board = [row[:] for row in start_board]
+            piece = start_piece
+            while True:
+                make_move(board, playout_move(board, piece, rng), piece)
+                piece = 1 if piece == 2 else 2
+                if is_terminal(board):
+                    break
+                if empty_cells(board) <= max_empty:
+                    entries[db_key(board, piece)] = (board, piece)
+                    break
+    return list(entries.values())
+
+
+def default_seeds():
+    """The midgame test positions and the empty board."""
+    from midgame_test import POSITIONS
+    seeds = [(pos["board"], pos["next_to_move"]) for pos in POSITIONS]
+    seeds.append((create_board(), 1))
+    return seeds
+
+
+def _solve_entries(entries):
+    """Pool worker: solve a chunk of entries and return their combined table."""
+    table = {}
+    for board, piece in entries:
+        solve([row[:] for row in board], piece, table)
+    return table
+
+
+def build(seeds, max_empty=DEFAULT_MAX_EMPTY, playouts=DEFAULT_PLAYOUTS, workers=None, seed=0):
+    """Return the merged {key: value} table for all positions reachable from the entries."""
+    entries = collect_entries(seeds, max_empty, playouts, seed)
+    print(f"{len(entries)} entry positions with <= {max_empty} empty cells")
+    chunks = [entries[i::max(1, (workers or 1) * 4)] for i in range(max(1, (workers or 1) * 4))]
+    chunks = [chunk for chunk in chunks if chunk]
+    table = {}
+    if workers and workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for part in pool.map(_solve_entries, chunks):
+                table.update(part)
+    else:
+        for chunk in chunks:
+            table.update(_solve_entries(chunk))
+    return table
+
+
+def write_db(table, path, max_empty):
+    keys = array("Q", sorted(table))
+    values = array("b", (table[k] for k in keys))
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, max_empty, len(keys)))
+        f.write(keys.tobytes())
+        f.write(values.tobytes())
+
+
+class EndgameDB:
+    """Read-only view of a database file; probe() is a binary search over the sorted keys."""
+
+    def __init__(self, keys, values, max_empty):
+        self.keys = keys
+        self.values = values
+        self.max_empty = max_empty
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            magic, version, max_empty, count = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a version {VERSION} endgame database")
+            keys = array("Q")
+            keys.frombytes(f.read(count * keys.itemsize))
+            values = array("b")
+            values.frombytes(f.read(count))
+        return cls(keys, values, max_empty)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def probe(self, board, to_move):
+        """Exact value for `to_move`, or None if the position is not in the database."""
+        key = db_key(board, to_move)
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return self.values[i]
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the Connect Four endgame database")
+    sub = parser.add_subparsers(dest="command", required=True)
+    b = sub.add_parser("build")
+    b.add_argument("--max-empty", type=int, default=DEFAULT_MAX_EMPTY)
+    b.add_argument("--playouts", type=int, default=DEFAULT_PLAYOUTS, help="random games per seed position")
+    b.add_argument("--workers", type=int, default=1)
+    b.add_argument("--seed", type=int, default=0)
+    b.add_argument("--out", default=DEFAULT_PATH)
+    info = sub.add_parser("info")
+    info.add_argument("path", nargs="?", default=DEFAULT_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        start = time.time()
+        table = build(default_seeds(), args.max_empty, args.playouts, args.workers, args.seed)
+        write_db(table, args.out, args.max_empty)
+        print(f"Wrote {len(table)} positions to {args.out} in {time.time() - start:.1f}s")
+    else:
+        db = EndgameDB.load(args.path)
+        wins = sum(1 for v in db.values if v > 0)
+        losses = sum(1 for v in db.values if v < 0)
+        print(f"{args.path}: {len(db)} positions, <= {db.max_empty} empty cells")
+        print(f"  side to move wins {wins}, loses {losses}, draws {len(db) - wins - losses}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+# engine.py
+# Long-lived engine process speaking a line-based text protocol on stdin/stdout
+#
+# Keeping one process per engine avoids paying the interpreter start for every game and keeps
+# the evaluation cache warm across searches; two checkouts of this repo can play each other
+# through match.py. Commands (one per line):
+#   isready                                   -> readyok
+#   position startpos [moves 3342]            one column digit per move, player 1 first
+#   go [depth N] [movetime MS] [nodes N]      search in the background, then:
+#                                                info depth D score S nodes N nps N time MS pv 2 3 2
+#                                                bestmove C   (or "bestmove none" if the game is over)
+#   go depth N multipv K                      K info lines "info multipv i depth D score S nodes N pv ...", best first
+#                                                (after a stop only the root moves searched so far)
+#   stop                                      finish the running search now (position and quit do too)
+#   quit
+# Problems are reported as "info string error: ..." and the command is ignored.
+
+import argparse
+import sys
+import threading
+
+import ai
+from board import parse_moves, get_valid_moves, check_win, create_board, PLAYER1, PLAYER2
+
+
+class Engine:
+    def __init__(self, out=sys.stdout):
+        self.out = out
+        self.out_lock = threading.Lock()
+        self.board = create_board()
+        self.piece = PLAYER1
+        self.thread = None
+        self.stop_event = None
+
+    def send(self, line):
+        with self.out_lock:
+            self.out.write(line + "\n")
+            self.out.flush()
+
+    def handle(self, line):
+        """Run one command. Returns False on quit."""
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, args = tokens[0], tokens[1:]
+        try:
+            if command == "quit":
+                self.stop()
+                return False
+            if command == "isready":
+                self.send("readyok")
+            elif command == "position":
+                self.position(args)
+            elif command == "go":
+                self.go(args)
+            elif command == "stop":
+                self.stop()
+            else:
+                raise ValueError(f"unknown command {command!r}")
+        except ValueError as e:
+            self.send(f"info string error: {e}")
+        return True
+
+    def position(self, args):
+        if not args or args[0] != "startpos":
+            raise ValueError("expected: position startpos [moves ...]")
+        moves = ""
+        if len(args) > 1:
+            if args[1] != "moves":
+                raise ValueError("expected: position startpos [moves ...]")
+            moves = "".join(args[2:])
+        board, piece = parse_moves(moves)
+        self.stop()
+        self.board, self.piece = board, piece
+
+    def go(self, args):
+        limits = {}
+        names = {"depth": "depth", "movetime": "time_limit", "nodes": "max_nodes", "multipv": "k"}
+        for name, value in zip(args[::2], args[1::2]):
+            if name not in names:
+                raise ValueError(f"unknown go limit {name!r}")
+            try:
+                limits[names[name]] = int(value)
+            except ValueError:
+                raise ValueError(f"{name} needs an integer") from None
+        if len(args) % 2:
+            raise ValueError(f"missing value for {args[-1]!r}")
+        for name in ("depth", "k"):
+            if limits.get(name, 1) < 1:
+                raise ValueError(f"{'multipv' if name == 'k' else name} must be at least 1")
+        if "k" in limits and set(limits) - {"k", "depth"}:
+            raise ValueError("multipv only takes a depth limit")
+        if "time_limit" in limits:
+            limits["time_limit"] /= 1000
+        if self.thread is not None and self.thread.is_alive():
+            raise ValueError("already searching")
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(
+            target=self._search, args=([row[:] for row in self.board], self.piece, limits, self.stop_event),
+            daemon=True
+        )
+        self.thread.start()
+
+    def _search(self, board, piece, limits, stop_event):
+        if not get_valid_moves(board) or check_win(board, PLAYER1) or check_win(board, PLAYER2):
+            self.send("bestmove none")
+            return
+        if "k" in limits:
+            ranked = ai.multi_pv(board, piece, stop_event=stop_event, **limits)
+            stats = ai.last_search_stats
+            for i, (col, score, pv) in enumerate(ranked, 1):
+                self.send(f"info multipv {i} depth {stats['depth']} score {score} nodes {stats['nodes']} "
+                          f"pv {' '.join(map(str, pv))}")
+            if ranked:
+                move = ranked[0][0]
+            else:
+                # stopped before the first root move was searched: a depth 1 search is instant
+                move = ai.pick_best_move(board, piece, depth=1)[0]
+            self.send(f"bestmove {move}")
+            return
+        move, time_taken, nodes = ai.pick_best_move(board, piece, stop_event=stop_event, **limits)
+        stats = dict(ai.last_search_stats)
+        pv = ai.principal_variation(board, piece, stats["depth"], move)
+        nps = int(nodes / time_taken) if time_taken else 0
+        self.send(f"info depth {stats['depth']} score {stats['score']} nodes {nodes} nps {nps} "
+                  f"time {int(time_taken * 1000)} pv {' '.join(map(str, pv))}")
+        self.send(f"bestmove {move}")
+
+    def stop(self):
+        """Stop the running search; its bestmove is sent before this returns."""
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Connect Four engine (line protocol on stdin/stdout)")
+    parser.add_argument("--eval-cache-mb", type=int, default=ai.DEFAULT_EVAL_CACHE_BYTES // (1024 * 1024),
+                        help="evaluation cache size kept across searches, 0 to disable")
+    parser.add_argument("--endgame-db", metavar="PATH", help="endgame database built by endgame.py")
+    args = parser.parse_args(argv)
+
+    if args.eval_cache_mb > 0:
+        ai.enable_eval_cache(args.eval_cache_mb * 1024 * 1024)
+    if args.endgame_db:
+        ai.load_endgame_db(args.endgame_db)
+
+    engine = Engine()
+    for line in sys.stdin:
+        if not engine.handle(line):
+            break
+    engine.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,11 +2,30 @@
 # Main game loop for human vs AI Connect Four in console
 
 # from board import create_board, print_board, make_move, check_win, check_draw, get_valid_moves
+import sys
 import board
 from ai import pick_best_move
+from ponder import Ponderer
 
-def play_game():
-    """Interactive Connect Four game between human (1) and AI (2)"""
+DIFFICULTY_DEPTHS = {
+    1: 1,  # EASY = naive minimax, close to beginner level
+    2: 2,  # MEDIUM = minimax depth 2
+    3: 4   # HARD = minimax depth 4
+}
+
+# Difficulty as a node budget: the same strength and the same thinking cost on any machine
+DIFFICULTY_NODES = {
+    1: 8,     # EASY = one ply
+    2: 60,    # MEDIUM = about two plies
+    3: 1500   # HARD = four plies and more as the board fills up
+}
+
+def play_game(ponder=True, node_budget=False):
+    """
+    Interactive Connect Four game between human (1) and AI (2)
+    With ponder=True the AI searches its replies while you choose your move.
+    With node_budget=True difficulties are node budgets instead of fixed depths.
+    """
     game_board = board.create_board()
     game_over = False
     turn = 0  # 0 = human, 1 = AI
@@ -26,11 +45,18 @@ def play_game():
             print("Invalid selection. Please enter 1, 2, or 3.")
         except ValueError:
             print("Invalid input. Enter a number between 1 and 3.")
+    if node_budget:
+        depth, max_nodes = None, DIFFICULTY_NODES[difficulty]
+    else:
+        depth, max_nodes = DIFFICULTY_DEPTHS[difficulty], None
+    ponderer = Ponderer(2) if ponder else None
             
     board.print_pretty_board(game_board)
 
     while not game_over:
         if turn == 0:  # Human turn
+            if ponderer:
+                ponderer.start(game_board, depth, max_nodes)
             valid_move = False
             while not valid_move:
                 try:
@@ -55,20 +81,13 @@ def play_game():
         else:  # AI turn
             print("AI is thinking...")
 
-            # Difficulty-based decision-making
-            if difficulty == 1:
-                  # EASY = naive minimax, close to beginner level
-                  col, ai_time, ai_nodes = pick_best_move(game_board, 2, depth=1)
-                  #ai_time = 0
-                  #ai_nodes = 0
-
-            elif difficulty == 2:
-                  # MEDIUM = minimax depth 2
-                  col, ai_time, ai_nodes = pick_best_move(game_board, 2, depth=2)
-
+            # Difficulty-based decision-making; use the pondered reply if there is one
+            pondered = ponderer.take(game_board, depth, max_nodes) if ponderer else None
+            if pondered:
+                col, ai_time, ai_nodes = pondered
+                print("(reply found while you were thinking)")
             else:
-                  # HARD = minimax depth 4
-                  col, ai_time, ai_nodes = pick_best_move(game_board, 2, depth=4)
+                col, ai_time, ai_nodes = pick_best_move(game_board, 2, depth=depth, max_nodes=max_nodes)
 
 
             board.make_move(game_board, col, 2)
@@ -94,5 +113,8 @@ def play_game():
         board.print_pretty_board(game_board)
         turn = (turn + 1) % 2  # Switch turns
 
+    if ponderer:
+        ponderer.stop()
+
 if __name__ == "__main__":
-    play_game()
+    play_game(ponder="--no-ponder" not in sys.argv, node_budget="--node-budget" in sys.argv)
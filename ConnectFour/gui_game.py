@@ -1,15 +1,23 @@
 # gui.py
 # Connect Four GUI using Tkinter with AI opponent
 
+import queue
+import threading
 import tkinter as tk
 from tkinter import messagebox
 import board
 from ai import pick_best_move, random_move
+from ponder import Ponderer
 
 ROWS, COLS = 6, 7
 CELL_SIZE = 80
 PLAYER_PIECE = 1
 AI_PIECE = 2
+POLL_MS = 30  # how often the Tk loop checks for a finished AI search
+ANIM_MS = 15  # frame interval of the drop animation
+ANIM_STEPS_PER_ROW = 4
+COLORS = {0: "white", PLAYER_PIECE: "red", AI_PIECE: "yellow"}
+DIFFICULTY_DEPTHS = {2: 2, 3: 4}  # Easy plays random moves
 
 class ConnectFourGUI:
     def __init__(self, master):
@@ -26,31 +34,84 @@ class ConnectFourGUI:
         tk.Radiobutton(master, text="Medium (Depth 2)", variable=self.difficulty_var, value=2).pack()
         tk.Radiobutton(master, text="Hard (Depth 4)", variable=self.difficulty_var, value=3).pack()
 
+        self.animate_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(master, text="Animate drops", variable=self.animate_var).pack()
+        self.ponder_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(master, text="AI thinks on your time", variable=self.ponder_var).pack()
+        self.ponderer = Ponderer(AI_PIECE)
+
         tk.Button(master, text="New Game", command=self.new_game).pack()
+        self.status_var = tk.StringVar()
+        tk.Label(master, textvariable=self.status_var).pack()
+
+        # AI searches run on a worker thread and report back through this queue
+        self.ai_results = queue.Queue()
+        self.search_id = 0
+        self.cancel_event = None
+        self.thinking_ticks = 0
+
+        # one persistent oval per cell; moves only change the fill of one item
+        self.cells = [[self.canvas.create_oval(*self.cell_coords(r, c), fill=COLORS[0])
+                       for c in range(COLS)] for r in range(ROWS)]
+        self.drawn = [[0] * COLS for _ in range(ROWS)]
+        self.falling = None
+        self.anim_job = None
         self.new_game()
 
     def new_game(self):
+        self.cancel_search()
+        self.ponderer.stop(wait=False)
+        self.stop_animation()
         self.game_board = board.create_board()
         self.game_over = False
         self.turn = 0  # 0 = human, 1 = AI
         self.draw_board()
+        self.start_pondering()
+
+    def cell_coords(self, r, c):
+        x0 = c * CELL_SIZE
+        y0 = (r+1) * CELL_SIZE
+        return x0+5, y0+5, x0+CELL_SIZE-5, y0+CELL_SIZE-5
+
+    def draw_cell(self, r, c):
+        cell = self.game_board[r][c]
+        if self.drawn[r][c] != cell:
+            self.canvas.itemconfig(self.cells[r][c], fill=COLORS[cell])
+            self.drawn[r][c] = cell
 
     def draw_board(self):
-        self.canvas.delete("all")
+        """Bring every cell in line with the board (only changed cells are touched)."""
         for r in range(ROWS):
             for c in range(COLS):
-                x0 = c * CELL_SIZE
-                y0 = (r+1) * CELL_SIZE
-                x1 = x0 + CELL_SIZE
-                y1 = y0 + CELL_SIZE
-                cell = self.game_board[r][c]
-                if cell == 0:
-                    color = "white"
-                elif cell == PLAYER_PIECE:
-                    color = "red"
-                else:
-                    color = "yellow"
-                self.canvas.create_oval(x0+5, y0+5, x1-5, y1-5, fill=color)
+                self.draw_cell(r, c)
+
+    def show_move(self, col, on_done):
+        """Draw the piece just played in col, optionally dropping it in, then call on_done."""
+        row = next(r for r in range(ROWS) if self.game_board[r][col] != 0)
+        if not self.animate_var.get():
+            self.draw_cell(row, col)
+            on_done()
+            return
+        color = COLORS[self.game_board[row][col]]
+        self.falling = self.canvas.create_oval(*self.cell_coords(-1, col), fill=color)
+        self.animate_drop(row, col, (row + 1) * ANIM_STEPS_PER_ROW, on_done)
+
+    def animate_drop(self, row, col, steps_left, on_done):
+        if steps_left > 0:
+            self.canvas.move(self.falling, 0, CELL_SIZE / ANIM_STEPS_PER_ROW)
+            self.anim_job = self.master.after(ANIM_MS, self.animate_drop, row, col, steps_left - 1, on_done)
+            return
+        self.stop_animation()
+        self.draw_cell(row, col)
+        on_done()
+
+    def stop_animation(self):
+        if self.anim_job is not None:
+            self.master.after_cancel(self.anim_job)
+            self.anim_job = None
+        if self.falling is not None:
+            self.canvas.delete(self.falling)
+            self.falling = None
 
     def human_move(self, event):
         if self.game_over or self.turn != 0:
@@ -59,47 +120,97 @@ class ConnectFourGUI:
         if col not in board.get_valid_moves(self.game_board):
             return
         board.make_move(self.game_board, col, PLAYER_PIECE)
+        self.turn = 1
+        self.show_move(col, self.after_human_move)
+
+    def after_human_move(self):
         if board.check_win(self.game_board, PLAYER_PIECE):
-            self.draw_board()
             messagebox.showinfo("Game Over", "Congratulations! You win!")
             self.game_over = True
             return
         elif board.check_draw(self.game_board):
-            self.draw_board()
             messagebox.showinfo("Game Over", "It's a draw!")
             self.game_over = True
             return
 
-        self.turn = 1
-        self.draw_board()
         self.master.after(200, self.ai_move)
 
     def ai_move(self):
         if self.game_over or self.turn != 1:
             return
-        difficulty = self.difficulty_var.get()
+        self.search_id += 1
+        self.cancel_event = threading.Event()
+        worker = threading.Thread(
+            target=self.search_worker,
+            args=(self.search_id, [row[:] for row in self.game_board], self.difficulty_var.get(), self.cancel_event),
+            daemon=True
+        )
+        worker.start()
+        self.thinking_ticks = 0
+        self.master.after(POLL_MS, self.poll_ai)
+
+    def search_worker(self, search_id, board_copy, difficulty, cancel_event):
+        """Runs off the Tk thread; only talks to the GUI through the queue."""
         if difficulty == 1:
-            col = random_move(self.game_board)
-        elif difficulty == 2:
-            col, _, _ = pick_best_move(self.game_board, AI_PIECE, depth=2)
+            col = random_move(board_copy)
         else:
-            col, _, _ = pick_best_move(self.game_board, AI_PIECE, depth=4)
+            depth = DIFFICULTY_DEPTHS[difficulty]
+            # waiting for the ponderer happens here, never on the Tk thread
+            pondered = self.ponderer.take(board_copy, depth)
+            if pondered:
+                col = pondered[0]
+            else:
+                col, _, _ = pick_best_move(board_copy, AI_PIECE, depth=depth, stop_event=cancel_event)
+        self.ai_results.put((search_id, col))
+
+    def cancel_search(self):
+        """Stop any running search; its result will be ignored."""
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            self.cancel_event = None
+        self.search_id += 1
+        self.status_var.set("")
+
+    def poll_ai(self):
+        while True:
+            try:
+                search_id, col = self.ai_results.get_nowait()
+            except queue.Empty:
+                break
+            if search_id == self.search_id:
+                self.cancel_event = None
+                self.status_var.set("")
+                self.play_ai_move(col)
+                return
+        if self.cancel_event is None:
+            return  # search was cancelled
+        self.thinking_ticks += 1
+        self.status_var.set("AI is thinking" + "." * (self.thinking_ticks // 10 % 4))
+        self.master.after(POLL_MS, self.poll_ai)
 
+    def play_ai_move(self, col):
+        if self.game_over or self.turn != 1:
+            return
         board.make_move(self.game_board, col, AI_PIECE)
+        self.show_move(col, self.after_ai_move)
 
+    def after_ai_move(self):
         if board.check_win(self.game_board, AI_PIECE):
-            self.draw_board()
             messagebox.showinfo("Game Over", "AI wins! Better luck next time.")
             self.game_over = True
             return
         elif board.check_draw(self.game_board):
-            self.draw_board()
             messagebox.showinfo("Game Over", "It's a draw!")
             self.game_over = True
             return
 
         self.turn = 0
-        self.draw_board()
+        self.start_pondering()
+
+    def start_pondering(self):
+        difficulty = self.difficulty_var.get()
+        if self.ponder_var.get() and difficulty in DIFFICULTY_DEPTHS:
+            self.ponderer.start(self.game_board, DIFFICULTY_DEPTHS[difficulty])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,138 @@
+# load_client.py
+# Load generator for server.py: plays many concurrent random-move games and
+# reports moves/sec and latency percentiles.
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+
+
+class Connection:
+    """One socket to the server; requests are pipelined and matched to replies by id."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.pending = {}
+        self.ids = itertools.count(1)
+        self.listener = asyncio.create_task(self.listen())
+
+    async def listen(self):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            reply = json.loads(line)
+            future = self.pending.pop(reply.get("id"), None)
+            if future is not None and not future.done():
+                future.set_result(reply)
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError("server closed the connection"))
+
+    async def request(self, **request):
+        request["id"] = next(self.ids)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request["id"]] = future
+        self.writer.write((json.dumps(request) + "\n").encode())
+        await self.writer.drain()
+        return await future
+
+    async def close(self):
+        self.writer.close()
+        self.listener.cancel()
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def player(conn, depth, deadline_ms, stop_at, rng, latencies, counters):
+    """Play games back to back until stop_at, recording the latency of every AI reply."""
+    while time.time() < stop_at:
+        reply = await conn.request(op="new", depth=depth)
+        if not reply["ok"]:
+            counters["errors"] += 1
+            await asyncio.sleep(0.05)
+            continue
+        game_id = reply["game"]
+        while reply.get("status") == "playing" and time.time() < stop_at:
+            start = time.perf_counter()
+            if reply.get("to_move") == "ai":
+                # an earlier reply missed its deadline: the AI still owes that move
+                reply = await conn.request(op="ai", game=game_id, deadline_ms=deadline_ms)
+            else:
+                col = rng.choice(reply["valid_moves"])
+                reply = await conn.request(op="move", game=game_id, col=col, deadline_ms=deadline_ms)
+            latency = time.perf_counter() - start
+            if not reply["ok"] or "ai_pending" in reply:
+                error = reply.get("ai_pending") or reply["error"]
+                counters["errors"] += 1
+                counters[error] = counters.get(error, 0) + 1
+                if error == "busy":
+                    await asyncio.sleep(0.05)
+                if not reply["ok"]:
+                    reply = await conn.request(op="state", game=game_id)
+                continue
+            latencies.append(latency)
+            counters["moves"] += 1
+        counters["games"] += 1
+        await conn.request(op="close", game=game_id)
+
+
+async def run_load(host, port, unix_path, connections, games, depth, deadline_ms, duration, seed):
+    conns = []
+    for _ in range(connections):
+        if unix_path:
+            reader, writer = await asyncio.open_unix_connection(unix_path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        conns.append(Connection(reader, writer))
+
+    latencies = []
+    counters = {"moves": 0, "games": 0, "errors": 0}
+    rng = random.Random(seed)
+    start = time.time()
+    stop_at = start + duration
+    await asyncio.gather(*(
+        player(conns[i % connections], depth, deadline_ms, stop_at, random.Random(rng.random()), latencies, counters)
+        for i in range(games)
+    ))
+    elapsed = time.time() - start
+    for conn in conns:
+        await conn.close()
+
+    latencies.sort()
+    print("\n=== Load Test Summary ===")
+    print(f"Concurrent games: {games} over {connections} connections, depth {depth}")
+    print(f"Duration: {elapsed:.1f}s | Games finished: {counters['games']} | Errors: {counters['errors']}")
+    for key, value in counters.items():
+        if key not in ("moves", "games", "errors"):
+            print(f"  {key}: {value}")
+    print(f"Moves/sec: {counters['moves'] / elapsed:.1f}")
+    for p in (50, 90, 99, 99.9):
+        print(f"  p{p} latency: {percentile(latencies, p) * 1000:.1f} ms")
+    if latencies:
+        print(f"  max latency: {latencies[-1] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load generator for the Connect Four server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", metavar="PATH")
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--games", type=int, default=1000, help="concurrent games")
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--deadline-ms", type=int, default=2000)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(run_load(args.host, args.port, args.unix, args.connections, args.games,
+                         args.depth, args.deadline_ms, args.duration, args.seed))
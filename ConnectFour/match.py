@@ -0,0 +1,171 @@
+# match.py
+# Match runner for engine processes (engine.py or anything speaking its protocol)
+#
+# Both engines stay alive for the whole match, so caches stay warm and no game pays for an
+# interpreter start. Every random opening is played twice with colors swapped. Engines are
+# command lines, so two checkouts of the repo can be played against each other:
+#   python match.py --a "python ../old/ConnectFour/engine.py" --go-a "depth 4" --go-b "depth 4"
+
+import argparse
+import os
+import shlex
+import subprocess
+import sys
+
+from board import create_board, make_move, is_valid_move, check_win, check_draw
+from tournament import DEFAULT_OPENING_PLIES, MatchStats, make_openings
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ENGINE = f"{shlex.quote(sys.executable)} {shlex.quote(os.path.join(HERE, 'engine.py'))}"
+DEFAULT_GO = "depth 4"
+
+
+class EngineError(Exception):
+    pass
+
+
+class EngineProcess:
+    """One engine subprocess; talks to it line by line."""
+
+    def __init__(self, command, name):
+        self.name = name
+        self.proc = subprocess.Popen(shlex.split(command), stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                     text=True, bufsize=1)
+        self.nodes = 0
+        self.time_ms = 0
+
+    def send(self, line):
+        self.proc.stdin.write(line + "\n")
+        self.proc.stdin.flush()
+
+    def read_until(self, prefix):
+        """Read lines until one starts with prefix; returns (that line, info lines before it)."""
+        infos = []
+        while True:
+            line = self.proc.stdout.readline()
+            if not line:
+                raise EngineError(f"{self.name} exited")
+            line = line.strip()
+            if line.startswith(prefix):
+                return line, infos
+            if line.startswith("info string error"):
+                raise EngineError(f"{self.name}: {line[len('info string '):]}")
+            if line.startswith("info"):
+                infos.append(line)
+
+    def ready(self):
+        self.send("isready")
+        self.read_until("readyok")
+
+    def best_move(self, moves, go):
+        """Column the engine plays after the move string `moves`."""
+        self.send(f"position startpos moves {moves}" if moves else "position startpos")
+        self.send(f"go {go}")
+        line, infos = self.read_until("bestmove")
+        if infos:
+            info = parse_info(infos[-1])
+            self.nodes += int(info.get("nodes", 0))
+            self.time_ms += int(info.get("time", 0))
+        value = line.split()[1]
+        if not value.isdigit():
+            raise EngineError(f"{self.name} returned {line!r}")
+        return int(value)
+
+    def close(self):
+        try:
+            self.send("quit")
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        self.proc.wait()
+
+
+def parse_info(line):
+    """'info depth 4 nodes 900 pv 3 2' -> {'depth': '4', 'nodes': '900', 'pv': '3 2'}"""
+    tokens = line.split()[1:]
+    info = {}
+    i = 0
+    while i < len(tokens):
+        if tokens[i] == "pv":
+            info["pv"] = " ".join(tokens[i + 1:])
+            break
+        if i + 1 < len(tokens):
+            info[tokens[i]] = tokens[i + 1]
+        i += 2
+    return info
+
+
+def play_game(opening, players, go):
+    """
+    Play one game from an opening; players and go map piece -> engine / go arguments.
+    Returns (winner, moves): winner 1, 2 or 0 for a draw. An illegal move loses.
+    """
+    board = create_board()
+    piece = 1
+    for ch in opening:
+        make_move(board, int(ch), piece)
+        piece = 3 - piece
+    moves = opening
+    while True:
+        col = players[piece].best_move(moves, go[piece])
+        if not 0 <= col < len(board[0]) or not is_valid_move(board, col):
+            print(f"  {players[piece].name} played illegal move {col}")
+            return 3 - piece, moves
+        make_move(board, col, piece)
+        moves += str(col)
+        if check_win(board, piece):
+            return piece, moves
+        if check_draw(board):
+            return 0, moves
+        piece = 3 - piece
+
+
+def run_match(engine_a, engine_b, go_a=DEFAULT_GO, go_b=DEFAULT_GO, pairs=10,
+              opening_plies=DEFAULT_OPENING_PLIES, seed=0):
+    """Play `pairs` opening pairs between two engine commands and return A's MatchStats."""
+    a = EngineProcess(engine_a, "A")
+    b = EngineProcess(engine_b, "B")
+    stats = MatchStats()
+    try:
+        a.ready()
+        b.ready()
+        for _, _, opening in make_openings(pairs, opening_plies, seed, with_moves=True):
+            for a_piece in (1, 2):
+                players = {a_piece: a, 3 - a_piece: b}
+                go = {a_piece: go_a, 3 - a_piece: go_b}
+                winner, moves = play_game(opening, players, go)
+                score = 0.5 if winner == 0 else float(winner == a_piece)
+                stats.add(score)
+                result = "draw" if winner == 0 else f"{players[winner].name} wins"
+                print(f"Game {stats.games}: A as player {a_piece}, {result} ({moves})")
+    finally:
+        a.close()
+        b.close()
+
+    for engine in (a, b):
+        nps = engine.nodes * 1000 / engine.time_ms if engine.time_ms else 0
+        print(f"{engine.name}: {engine.nodes} nodes in {engine.time_ms / 1000:.1f}s ({nps:.0f} nodes/s)")
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play two engine processes against each other")
+    parser.add_argument("--a", default=DEFAULT_ENGINE, help="command line of engine A")
+    parser.add_argument("--b", default=DEFAULT_ENGINE, help="command line of engine B")
+    parser.add_argument("--go-a", default=DEFAULT_GO, help='search limits for A, e.g. "movetime 100"')
+    parser.add_argument("--go-b", default=DEFAULT_GO, help='search limits for B, e.g. "nodes 2000"')
+    parser.add_argument("--pairs", type=int, default=10, help="openings, each played with both colors")
+    parser.add_argument("--opening-plies", type=int, default=DEFAULT_OPENING_PLIES)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    stats = run_match(args.a, args.b, args.go_a, args.go_b, args.pairs, args.opening_plies, args.seed)
+    if stats.games:
+        elo, elo_low, elo_high = stats.elo()
+        print(f"\nA: +{stats.wins} ={stats.draws} -{stats.losses} | "
+              f"Elo {elo:+.1f} [{elo_low:+.1f}, {elo_high:+.1f}]")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -300,11 +300,11 @@ if __name__ == "__main__":
 # Evaluation of Depth-1 (easy) AI against Depth-2 and Depth-4
 # Includes graphical analysis of win rates and move times
 # Added terminal logging for live progress and final summary
+# matplotlib is only imported when plots are drawn; --headless writes them to PNG files
 
 import csv
+import os
 from collections import Counter
-import matplotlib.pyplot as plt
-import pandas as pd
 
 from board import ROWS, COLS, create_board, make_move, get_valid_moves, check_win, check_draw
 from ai import pick_best_move
@@ -460,7 +460,11 @@ def print_depth1_summary(summary):
         avg_time = sum(stats['times'])/len(stats['times']) if stats['times'] else 0
         print(f"{matchup}: {stats['wins']}W / {stats['losses']}L / {stats['draws']}D | Total Games: {total_games} | Avg Move Time: {avg_time:.10f}s")
 
-def run_all_tests(out_csv="midgame_results.csv"):
+def run_all_tests(out_csv="midgame_results.csv", headless=False, plot_dir="."):
+    """
+    Play every position/matchup, save the CSV and plot the Depth-1 summary.
+    headless=True renders the plots to PNG files in plot_dir instead of showing them.
+    """
     rows = []
     header = [
         "Position", "Matchup", "Starting Player", "Winner", "Total Moves",
@@ -539,21 +543,44 @@ def run_all_tests(out_csv="midgame_results.csv"):
                 ])
 
     # Save CSV
-    df = pd.DataFrame(rows, columns=header)
-    df.to_csv(out_csv, index=False)
+    with open(out_csv, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
     print(f"\nResults saved to {out_csv}")
 
     # Print final cumulative Depth-1 summary
     print_depth1_summary(depth1_summary)
     
     # ===== PLOTS =====
-    plot_depth1_winrates(depth1_summary)
-    plot_depth1_times(depth1_summary)
+    if headless:
+        os.makedirs(plot_dir, exist_ok=True)
+        plot_depth1_winrates(depth1_summary, os.path.join(plot_dir, "depth1_winrates.png"))
+        plot_depth1_times(depth1_summary, os.path.join(plot_dir, "depth1_times.png"))
+    else:
+        plot_depth1_winrates(depth1_summary)
+        plot_depth1_times(depth1_summary)
 
 
-def plot_depth1_winrates(summary):
-    """Bar chart: Depth-1 wins/losses/draws vs Depth-2 and Depth-4"""
+def _pyplot(out_path):
+    """Import pyplot on first use; saving to a file selects the non-interactive Agg backend."""
+    import matplotlib
+    if out_path:
+        matplotlib.use("Agg")
     import matplotlib.pyplot as plt
+    return plt
+
+def _finish_plot(plt, out_path):
+    if out_path:
+        plt.savefig(out_path)
+        plt.close()
+        print(f"Plot saved to {out_path}")
+    else:
+        plt.show()
+
+def plot_depth1_winrates(summary, out_path=None):
+    """Bar chart: Depth-1 wins/losses/draws vs Depth-2 and Depth-4"""
+    plt = _pyplot(out_path)
     import numpy as np
 
     categories = ["D1_vs_D2", "D1_vs_D4"]
@@ -573,12 +600,11 @@ def plot_depth1_winrates(summary):
     plt.title("Depth-1 Win/Loss/Draw Performance")
     plt.legend()
     plt.tight_layout()
-    plt.show()
+    _finish_plot(plt, out_path)
 
-def plot_depth1_times(summary):
+def plot_depth1_times(summary, out_path=None):
     """Bar chart: average move time per turn for Depth-1 vs Depth-2/Depth-4"""
-    import matplotlib.pyplot as plt
-    import numpy as np
+    plt = _pyplot(out_path)
 
     categories = ["D1_vs_D2", "D1_vs_D4"]
     avg_times = [sum(summary[c]["times"])/len(summary[c]["times"]) if summary[c]["times"] else 0 for c in categories]
@@ -588,7 +614,15 @@ def plot_depth1_times(summary):
     plt.ylabel("Average Move Time (s)")
     plt.title("Depth-1 Average Move Time Comparison")
     plt.tight_layout()
-    plt.show()
+    _finish_plot(plt, out_path)
 
 if __name__ == "__main__":
-    run_all_tests()
+    import argparse
+    from searchtools import add_search_tool_arguments, search_tools
+    parser = argparse.ArgumentParser(description="Depth-1 AI against Depth-2 and Depth-4 from midgame positions")
+    parser.add_argument("--headless", action="store_true", help="write the plots to PNG files instead of showing them")
+    add_search_tool_arguments(parser)
+    args = parser.parse_args()
+
+    with search_tools(args):
+        run_all_tests(headless=args.headless)
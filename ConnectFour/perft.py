@@ -0,0 +1,127 @@
+# perft.py
+# Move-generation benchmark and correctness check for the board rules
+#
+# perft(N) counts every legal move sequence of exactly N plies from a position; a game that
+# ends earlier is not continued. The counts from the empty board are known, so they double as
+# checksums for make_move / undo_move / get_valid_moves / check_win / check_draw, and the
+# positions per second measure those functions without any search on top.
+# --module runs the same walk over another board implementation with the same functions,
+# e.g. a bitboard prototype, to check it gives the same counts and compare speed.
+#   python perft.py --depth 8 --verify
+#   python perft.py --depth 9 --memo --module bitboard
+
+import argparse
+import importlib
+import sys
+import time
+
+# perft(0..9) from the empty 6x7 board
+EMPTY_BOARD_PERFT = [1, 7, 49, 343, 2401, 16807, 117649, 823536, 5673234, 39394572]
+
+
+class Counter:
+    """make_move calls, i.e. positions generated, during one perft run."""
+
+    def __init__(self):
+        self.positions = 0
+
+
+def perft(rules, board, piece, depth, memo=None, counter=None):
+    """
+    Number of move sequences of `depth` plies from `board` with `piece` to move.
+    With a memo dict, counts of transposed positions are reused (needs rules.position_key).
+    """
+    if depth == 0:
+        return 1
+    if memo is not None:
+        key = (rules.position_key(board), depth)
+        count = memo.get(key)
+        if count is not None:
+            return count
+
+    opp = 1 if piece == 2 else 2
+    total = 0
+    for col in rules.get_valid_moves(board):
+        rules.make_move(board, col, piece)
+        if counter is not None:
+            counter.positions += 1
+        if depth == 1:
+            total += 1
+        elif not (rules.check_win(board, piece) or rules.check_draw(board)):
+            total += perft(rules, board, opp, depth - 1, memo, counter)
+        rules.undo_move(board, col)
+
+    if memo is not None:
+        memo[key] = total
+    return total
+
+
+def divide(rules, board, piece, depth, memo=None):
+    """perft split by first move: {col: count}, for finding where two implementations differ."""
+    opp = 1 if piece == 2 else 2
+    counts = {}
+    for col in rules.get_valid_moves(board):
+        rules.make_move(board, col, piece)
+        if depth == 1:
+            counts[col] = 1
+        elif rules.check_win(board, piece) or rules.check_draw(board):
+            counts[col] = 0
+        else:
+            counts[col] = perft(rules, board, opp, depth - 1, memo)
+        rules.undo_move(board, col)
+    return counts
+
+
+def run_perft(rules, depth, memo=False, moves=""):
+    """Time perft(1..depth); returns a list of (depth, leaves, positions, seconds)."""
+    results = []
+    for d in range(1, depth + 1):
+        board = rules.create_board()
+        piece = 1
+        for ch in moves:
+            rules.make_move(board, int(ch), piece)
+            piece = 1 if piece == 2 else 2
+        counter = Counter()
+        start = time.perf_counter()
+        leaves = perft(rules, board, piece, d, {} if memo else None, counter)
+        results.append((d, leaves, counter.positions, time.perf_counter() - start))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Count legal move sequences (perft) to measure board speed")
+    parser.add_argument("--depth", type=int, default=7)
+    parser.add_argument("--moves", default="", help="start from this move string instead of the empty board")
+    parser.add_argument("--memo", action="store_true", help="reuse counts of transposed positions")
+    parser.add_argument("--module", default="board", help="board implementation to test (default board)")
+    parser.add_argument("--divide", action="store_true", help="print the count after each first move")
+    parser.add_argument("--verify", action="store_true", help="check the empty-board counts")
+    args = parser.parse_args(argv)
+
+    rules = importlib.import_module(args.module)
+    print(f"perft of {args.module} from {args.moves or 'the empty board'}"
+          f"{' with transposition memo' if args.memo else ''}")
+    print(f"{'depth':>5}{'leaves':>14}{'positions':>14}{'seconds':>10}{'positions/s':>14}")
+    failed = False
+    for depth, leaves, positions, seconds in run_perft(rules, args.depth, args.memo, args.moves):
+        rate = positions / seconds if seconds else 0
+        line = f"{depth:>5}{leaves:>14}{positions:>14}{seconds:>10.3f}{rate:>14.0f}"
+        if args.verify and not args.moves and depth < len(EMPTY_BOARD_PERFT):
+            ok = leaves == EMPTY_BOARD_PERFT[depth]
+            failed |= not ok
+            line += "  ok" if ok else f"  MISMATCH (expected {EMPTY_BOARD_PERFT[depth]})"
+        print(line)
+
+    if args.divide:
+        board = rules.create_board()
+        piece = 1
+        for ch in args.moves:
+            rules.make_move(board, int(ch), piece)
+            piece = 1 if piece == 2 else 2
+        counts = divide(rules, board, piece, args.depth, {} if args.memo else None)
+        print("\n" + "\n".join(f"{col}: {count}" for col, count in counts.items()))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+# ponder.py
+# Pondering: search the AI's answers to the human's likely moves while the human is thinking
+
+import threading
+
+from board import make_move, get_valid_moves, check_win, check_draw, position_key
+from ai import pick_best_move, score_position
+
+
+def predict_replies(board, piece):
+    """
+    Order the moves available to `piece` from most to least likely.
+    Immediate wins come first, then moves by their static score.
+    """
+    ranked = []
+    for col in get_valid_moves(board):
+        temp_b = [row[:] for row in board]
+        make_move(temp_b, col, piece)
+        if check_win(temp_b, piece):
+            ranked.append((float("inf"), col))
+        else:
+            ranked.append((score_position(temp_b, piece), col))
+    ranked.sort(key=lambda item: -item[0])
+    return [col for _, col in ranked]
+
+
+class Ponderer:
+    """
+    Background searcher for one AI side.
+    start() is called right after the AI moves; take() is called once the human
+    has replied and returns the pondered (col, time_taken, nodes) or None.
+    start/stop and take may run on different threads: each pondering session has its
+    own stop event and results, and only the calls on the current session change them.
+    """
+
+    def __init__(self, ai_piece):
+        self.ai_piece = ai_piece
+        self.human_piece = 1 if ai_piece == 2 else 2
+        # the current session; all of these are guarded by lock
+        self.results = {}  # (position key, depth, max_nodes) -> (col, time_taken, nodes)
+        self.thread = None
+        self.stop_event = None
+        self.current = None  # key being searched right now
+        self.finish_current = False
+        self.lock = threading.Lock()
+
+    def start(self, board, depth, max_nodes=None):
+        """Start pondering the human replies to `board` (human to move)."""
+        self.stop()
+        stop_event = threading.Event()
+        results = {}
+        thread = threading.Thread(
+            target=self._run, args=([row[:] for row in board], depth, max_nodes, stop_event, results), daemon=True
+        )
+        with self.lock:
+            self.thread, self.stop_event, self.results = thread, stop_event, results
+            self.current = None
+            self.finish_current = False
+        thread.start()
+
+    def _run(self, board, depth, max_nodes, stop_event, results):
+        for col in predict_replies(board, self.human_piece):
+            temp_b = [row[:] for row in board]
+            make_move(temp_b, col, self.human_piece)
+            if check_win(temp_b, self.human_piece) or check_draw(temp_b):
+                continue
+            key = (position_key(temp_b), depth, max_nodes)
+            with self.lock:
+                # a session that is no longer current always has its stop event set
+                if stop_event.is_set() or self.finish_current:
+                    return
+                self.current = key
+            result = pick_best_move(temp_b, self.ai_piece, depth=depth, stop_event=stop_event,
+                                    max_nodes=max_nodes)
+            with self.lock:
+                if stop_event.is_set():
+                    return  # interrupted: the result may be from a shallower depth
+                self.current = None
+                results[key] = result
+
+    def stop(self, wait=True):
+        """Cancel pondering and drop all results."""
+        with self.lock:
+            thread, stop_event = self.thread, self.stop_event
+            if stop_event is not None:
+                stop_event.set()
+            self.thread = None
+            self.stop_event = None
+            self.results = {}
+        if wait and thread is not None:
+            thread.join()
+
+    def take(self, board, depth, max_nodes=None):
+        """
+        Return the pondered reply for `board` (AI to move) at `depth` / `max_nodes`, or None.
+        If that exact position is being searched right now it is allowed to finish;
+        every other pondering search is cancelled.
+        """
+        key = (position_key(board), depth, max_nodes)
+        with self.lock:
+            thread, stop_event, results = self.thread, self.stop_event, self.results
+            if thread is not None:
+                if self.current == key:
+                    self.finish_current = True
+                else:
+                    stop_event.set()
+        if thread is not None:
+            thread.join()
+        with self.lock:
+            # start() or stop() may have replaced the session while we waited
+            if self.stop_event is stop_event:
+                self.thread = None
+                self.results = {}
+        return results.get(key)
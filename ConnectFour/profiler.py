@@ -0,0 +1,133 @@
+# profiler.py
+# Opt-in instrumentation of the search hot path
+#
+# While enabled, minimax, check_win, score_position and evaluate_window in the ai module are
+# replaced by timing wrappers; disabled, the original functions are restored, so there is no
+# cost at all when profiling is off. Results export to pstats and to collapsed stacks
+# (one "a;b;c <microseconds>" line per stack, the input format of flamegraph.pl / speedscope).
+#
+# Scripts enable it with --profile PREFIX or the CONNECT4_PROFILE=PREFIX environment variable,
+# writing PREFIX.pstats and PREFIX.folded.
+
+import contextlib
+import functools
+import pstats
+import sys
+import time
+
+import ai
+
+ENV_VAR = "CONNECT4_PROFILE"
+PROFILED_FUNCTIONS = ("minimax", "check_win", "score_position", "evaluate_window")
+
+
+class SearchProfiler:
+    def __init__(self, functions=PROFILED_FUNCTIONS):
+        self.functions = functions
+        self.counts = {}    # name -> [calls, primitive calls, self time, cumulative time]
+        self.callers = {}   # name -> {caller name: calls}
+        self.stacks = {}    # "a;b;c" -> self time
+        self.codes = {}     # name -> (filename, line, name) for pstats
+        self._stack = []    # [name, time spent in children] per active call
+        self._active = {}   # name -> number of active calls (for recursion)
+        self._originals = {}
+
+    def enable(self):
+        for name in self.functions:
+            func = getattr(ai, name)
+            self._originals[name] = func
+            code = func.__code__
+            self.codes[name] = (code.co_filename, code.co_firstlineno, name)
+            self.counts.setdefault(name, [0, 0, 0.0, 0.0])
+            self.callers.setdefault(name, {})
+            setattr(ai, name, self._wrap(name, func))
+
+    def disable(self):
+        for name, func in self._originals.items():
+            setattr(ai, name, func)
+        self._originals = {}
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self.disable()
+
+    def _wrap(self, name, func):
+        stack = self._stack
+        active = self._active
+        counts = self.counts[name]
+        callers = self.callers[name]
+        stacks = self.stacks
+        clock = time.perf_counter
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            frame = [name, 0.0]
+            stack.append(frame)
+            depth = active.get(name, 0)
+            active[name] = depth + 1
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                active[name] = depth
+                path = ";".join(f[0] for f in stack)
+                stack.pop()
+                self_time = elapsed - frame[1]
+                if stack:
+                    stack[-1][1] += elapsed
+                    caller = stack[-1][0]
+                else:
+                    caller = "<search>"
+                counts[0] += 1
+                counts[2] += self_time
+                if depth == 0:
+                    # recursive calls are already inside the outermost call's cumulative time
+                    counts[1] += 1
+                    counts[3] += elapsed
+                callers[caller] = callers.get(caller, 0) + 1
+                stacks[path] = stacks.get(path, 0.0) + self_time
+        return wrapper
+
+    def create_stats(self):
+        """Build the dict pstats.Stats expects (it calls this when given the profiler)."""
+        self.stats = {}
+        for name, (calls, primitive, tottime, cumtime) in self.counts.items():
+            if not calls:
+                continue
+            # calls from outside the profiled functions have no caller entry, as in cProfile;
+            # a made-up key would have no stats of its own and break print_callers
+            callers = {self.codes[caller]: n for caller, n in self.callers[name].items() if caller in self.codes}
+            self.stats[self.codes[name]] = (primitive, calls, tottime, cumtime, callers)
+
+    def dump_stats(self, path):
+        pstats.Stats(self).dump_stats(path)
+
+    def write_collapsed(self, path):
+        with open(path, "w") as f:
+            for stack, seconds in sorted(self.stacks.items()):
+                f.write(f"{stack} {int(seconds * 1e6)}\n")
+
+    def print_summary(self, out=sys.stdout):
+        out.write("\n=== Search Profile ===\n")
+        out.write(f"{'function':<16}{'calls':>12}{'self (s)':>12}{'cumulative (s)':>16}\n")
+        for name, (calls, _, tottime, cumtime) in sorted(self.counts.items(), key=lambda kv: -kv[1][2]):
+            out.write(f"{name:<16}{calls:>12}{tottime:>12.4f}{cumtime:>16.4f}\n")
+
+
+@contextlib.contextmanager
+def profiling(prefix):
+    """Profile the enclosed code and write PREFIX.pstats and PREFIX.folded; no-op when prefix is None."""
+    if prefix is None:
+        yield None
+        return
+    profiler = SearchProfiler()
+    with profiler:
+        yield profiler
+    profiler.print_summary()
+    profiler.dump_stats(prefix + ".pstats")
+    profiler.write_collapsed(prefix + ".folded")
+    print(f"Profile written to {prefix}.pstats and {prefix}.folded")
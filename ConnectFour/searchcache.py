@@ -0,0 +1,127 @@
+# searchcache.py
+# Persistent search cache: minimax results kept in an sqlite file and reused by later runs
+#
+# An entry is keyed by (position key, root piece, maximizing, remaining depth) and holds the
+# bound, score and best move of a fully searched subtree, so the next search of the same
+# position to the same depth can cut off there, like a transposition table that survives
+# the process. Nothing is read up front: lookups query the file on demand. New entries are
+# buffered and written in batches with upserts; several processes can share one file (WAL
+# journal), and an exact score is never overwritten by a bound.
+#
+# The file records ai.EVAL_VERSION and is emptied when opened by a different evaluation.
+# Scripts enable it with --cache PATH or the CONNECT4_CACHE=PATH environment variable.
+
+import atexit
+import contextlib
+import os
+
+ENV_VAR = "CONNECT4_CACHE"
+EXACT, LOWER, UPPER = 0, 1, 2
+FLUSH_ENTRIES = 20000  # buffered entries written per transaction
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS entries (
+    key INTEGER, piece INTEGER, maximizing INTEGER, depth INTEGER,
+    bound INTEGER, score INTEGER, move INTEGER,
+    PRIMARY KEY (key, piece, maximizing, depth)
+) WITHOUT ROWID;
+"""
+
+UPSERT = """
+INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (key, piece, maximizing, depth) DO UPDATE
+SET bound = excluded.bound, score = excluded.score, move = excluded.move
+WHERE excluded.bound = 0 OR entries.bound != 0
+"""
+
+
+class SearchCache:
+    def __init__(self, path, eval_version):
+        self.path = path
+        self.eval_version = str(eval_version)
+        self.pending = {}  # (key, piece, maximizing, depth) -> (bound, score, move)
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        self._pid = None
+        atexit.register(self.close)
+
+    def _connection(self):
+        if self._pid != os.getpid():
+            # first use, or a forked worker: never share the parent's connection or buffer
+            self.pending = {}
+            import sqlite3  # only when a cache is actually used, ai imports this module
+            self._conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            self._pid = os.getpid()
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+            self._conn.execute("BEGIN IMMEDIATE")
+            row = self._conn.execute("SELECT value FROM meta WHERE name = 'eval_version'").fetchone()
+            if row is None or row[0] != self.eval_version:
+                self._conn.execute("DELETE FROM entries")
+                self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('eval_version', ?)", (self.eval_version,))
+            self._conn.execute("COMMIT")
+        return self._conn
+
+    def lookup(self, key, piece, maximizing, depth):
+        """(bound, score, move) stored for the position, or None."""
+        conn = self._connection()
+        entry_key = (key, piece, maximizing, depth)
+        entry = self.pending.get(entry_key)
+        if entry is None:
+            entry = conn.execute(
+                "SELECT bound, score, move FROM entries WHERE key = ? AND piece = ? AND maximizing = ? AND depth = ?",
+                entry_key
+            ).fetchone()
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def store(self, key, piece, maximizing, depth, bound, score, move):
+        entry_key = (key, piece, maximizing, depth)
+        old = self.pending.get(entry_key)
+        if old is None or old[0] != EXACT or bound == EXACT:
+            self.pending[entry_key] = (bound, score, move)
+        if len(self.pending) >= FLUSH_ENTRIES:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered entries in one transaction."""
+        if not self.pending:
+            return
+        conn = self._connection()
+        rows = [k + v for k, v in self.pending.items()]
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany(UPSERT, rows)
+        conn.execute("COMMIT")
+        self.pending = {}
+
+    def __len__(self):
+        self.flush()
+        return self._connection().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self):
+        if self._pid == os.getpid():
+            self.flush()
+            self._conn.close()
+        self._conn = None
+        self._pid = None
+
+
+@contextlib.contextmanager
+def using_search_cache(path):
+    """Search with the persistent cache at `path` inside the block; no-op when path is None."""
+    if path is None:
+        yield None
+        return
+    import ai
+    cache = ai.enable_search_cache(path)
+    try:
+        yield cache
+    finally:
+        ai.disable_search_cache()
+        print(f"Search cache {path}: {cache.hits} hits, {cache.misses} misses")
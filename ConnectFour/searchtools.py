@@ -0,0 +1,41 @@
+# searchtools.py
+# --profile, --cache and --trace for scripts that run many searches
+#
+# add_search_tool_arguments adds the three options to a script's argparse parser; a missing
+# option falls back to its environment variable (CONNECT4_PROFILE, CONNECT4_CACHE,
+# CONNECT4_TRACE). search_tools(args) then runs the enclosed code with the profiler,
+# the persistent search cache and the trace recorder that were asked for.
+
+import contextlib
+import os
+
+
+def env_value(name):
+    """Value of environment variable `name`, or None when it is unset or empty."""
+    return os.environ.get(name) or None
+
+
+def add_search_tool_arguments(parser):
+    import profiler
+    import searchcache
+    import searchtrace
+    group = parser.add_argument_group("search tools")
+    group.add_argument("--profile", metavar="PREFIX", nargs="?", const="search_profile",
+                       default=env_value(profiler.ENV_VAR),
+                       help=f"profile the searches, write PREFIX.pstats and PREFIX.folded (${profiler.ENV_VAR})")
+    group.add_argument("--cache", metavar="PATH", nargs="?", const="search_cache.sqlite",
+                       default=env_value(searchcache.ENV_VAR),
+                       help=f"start from and extend a persistent search cache (${searchcache.ENV_VAR})")
+    group.add_argument("--trace", metavar="PATH", nargs="?", const="search_trace.bin",
+                       default=env_value(searchtrace.ENV_VAR),
+                       help=f"record the search trees, see searchtrace.py report (${searchtrace.ENV_VAR})")
+
+
+@contextlib.contextmanager
+def search_tools(args):
+    """Profile, cache and trace the enclosed searches as the parsed arguments ask."""
+    from profiler import profiling
+    from searchcache import using_search_cache
+    from searchtrace import tracing
+    with profiling(args.profile), using_search_cache(args.cache), tracing(args.trace):
+        yield
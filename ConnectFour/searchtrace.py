@@ -0,0 +1,273 @@
+# searchtrace.py
+# Opt-in search tree recorder and pruning report
+#
+# While enabled, ai.minimax is replaced by a wrapper (like profiler.py does) that writes one
+# fixed-size binary record per searched node: parent, move, alpha/beta on entry, returned score,
+# subtree size, index of the best move in the move order and why the node stopped
+# (all moves searched, cutoff, leaf, terminal, cache/database hit, aborted). Disabled, the
+# original function is restored, so minimax pays nothing. `sample` records only a fraction
+# of the searches and `max_ply` only the top of each tree.
+#
+# The report shows how often the best move came first, and which subtrees were wasted
+# because a cutoff move was searched late:
+#   python searchtrace.py record --moves 3342 --depth 6 --out trace.bin
+#   python searchtrace.py report trace.bin
+# Scripts record with --trace PATH or the CONNECT4_TRACE=PATH environment variable.
+
+import argparse
+import contextlib
+import heapq
+import random
+import struct
+import sys
+from collections import Counter
+
+import ai
+from board import get_valid_moves, check_win, parse_moves
+
+ENV_VAR = "CONNECT4_TRACE"
+MAGIC = b"C4ST"
+VERSION = 1
+HEADER = struct.Struct("<4sHH")
+# node, parent, ply, depth, move, order, best, reason, children, alpha, beta, score, size
+RECORD = struct.Struct("<IIBBbbbBBiiiI")
+NO_PARENT = 0xFFFFFFFF
+INT_MAX = 2 ** 31 - 1
+BUFFER_BYTES = 1 << 20
+
+ALL, CUTOFF, LEAF, TERMINAL, HIT, ABORTED = range(6)
+REASONS = ("all moves", "cutoff", "leaf", "terminal", "cache/db hit", "aborted")
+
+
+def _int32(x):
+    if x == float("inf"):
+        return INT_MAX
+    if x == -float("inf"):
+        return -INT_MAX - 1
+    return max(-INT_MAX - 1, min(INT_MAX, int(x)))
+
+
+class SearchRecorder:
+    def __init__(self, path, sample=1.0, max_ply=None, seed=0):
+        self.path = path
+        self.sample = sample
+        self.max_ply = ai.MAX_DEPTH if max_ply is None else max_ply
+        self.rng = random.Random(seed)
+        self.nodes = 0
+        self._file = None
+        self._buffer = bytearray()
+        self._stack = []      # [node id, valid moves, children searched] per recorded active call
+        self._level = 0       # active minimax calls, recorded or not
+        self._recording = False
+        self._original = None
+
+    def enable(self):
+        self._file = open(self.path, "wb")
+        self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+        self._original = ai.minimax
+        ai.minimax = self._wrap(ai.minimax)
+
+    def disable(self):
+        if self._original is not None:
+            ai.minimax = self._original
+            self._original = None
+        if self._file is not None:
+            self._file.write(self._buffer)
+            self._file.close()
+            self._file = None
+            self._buffer = bytearray()
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self.disable()
+
+    def _wrap(self, func):
+        stack = self._stack
+        buffer = self._buffer
+        pack = RECORD.pack
+
+        def wrapper(board, depth, alpha, beta, maximizingPlayer, piece):
+            level = self._level
+            if level == 0:
+                self._recording = self.sample >= 1 or self.rng.random() < self.sample
+            if not self._recording or level > self.max_ply:
+                if stack and level == len(stack):
+                    stack[-1][2] += 1  # child of a recorded node
+                self._level = level + 1
+                try:
+                    return func(board, depth, alpha, beta, maximizingPlayer, piece)
+                finally:
+                    self._level = level
+
+            if stack:
+                parent = stack[-1]
+                order = parent[2]
+                parent[2] += 1
+                parent_id = parent[0]
+                move = parent[1][order] if order < len(parent[1]) else -1
+            else:
+                parent_id, order, move = NO_PARENT, -1, -1
+            node_id = self.nodes
+            self.nodes += 1
+            valid = get_valid_moves(board)
+            frame = [node_id, valid, 0]
+            stack.append(frame)
+            self._level = level + 1
+            before = ai.nodes_expanded
+            col, score, reason = None, 0, ABORTED
+            try:
+                col, score = func(board, depth, alpha, beta, maximizingPlayer, piece)
+                children = frame[2]
+                if children == 0:
+                    if not valid or check_win(board, 1) or check_win(board, 2):
+                        reason = TERMINAL
+                    else:
+                        reason = LEAF if depth == 0 else HIT
+                else:
+                    reason = CUTOFF if children < len(valid) else ALL
+                return col, score
+            finally:
+                self._level = level
+                stack.pop()
+                best = valid.index(col) if frame[2] and col in valid else -1
+                buffer.extend(pack(node_id, parent_id, level, depth, move, order, best, reason, min(frame[2], 255),
+                                   _int32(alpha), _int32(beta), _int32(score), ai.nodes_expanded - before))
+                if len(buffer) >= BUFFER_BYTES:
+                    self._file.write(buffer)
+                    del buffer[:]
+        return wrapper
+
+
+def read_trace(path):
+    """Yield records as tuples in the order they were written (children before their parent)."""
+    with open(path, "rb") as f:
+        magic, version, size = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION or size != RECORD.size:
+            raise ValueError(f"{path} is not a version {VERSION} search trace")
+        while True:
+            chunk = f.read(RECORD.size * 4096)
+            if not chunk:
+                return
+            yield from RECORD.iter_unpack(chunk[:len(chunk) - len(chunk) % RECORD.size])
+
+
+def analyze_trace(records, top=10):
+    """
+    One pass over the records. A cutoff node whose cutoff move was not searched first
+    wasted the subtrees of the moves before it: with the cutoff move first they would
+    not have been searched at all. Wasted subtrees nested in other wasted subtrees are
+    counted once in the total.
+    """
+    pending = {}  # parent id -> [(order, size, move, wasted nodes inside)] of finished children
+    reasons = Counter()
+    best_index = {ALL: Counter(), CUTOFF: Counter()}
+    per_ply = {}  # ply -> [recorded nodes, size of the wasted subtrees directly below]
+    largest = []  # heap of (size, node, ply, move)
+    searches = searched = total = wasted = 0
+
+    for node, parent, ply, depth, move, order, best, reason, children, alpha, beta, score, size in records:
+        total += 1
+        reasons[reason] += 1
+        ply_stats = per_ply.setdefault(ply, [0, 0])
+        ply_stats[0] += 1
+        if reason in best_index and best >= 0:
+            best_index[reason][best] += 1
+        inside = 0
+        for kid_order, kid_size, kid_move, kid_inside in pending.pop(node, ()):
+            if reason == CUTOFF and kid_order < best:
+                inside += kid_size
+                ply_stats[1] += kid_size
+                item = (kid_size, node, ply, kid_move)
+                if len(largest) < top:
+                    heapq.heappush(largest, item)
+                else:
+                    heapq.heappushpop(largest, item)
+            else:
+                inside += kid_inside
+        if parent == NO_PARENT:
+            searches += 1
+            searched += size
+            wasted += inside
+        else:
+            pending.setdefault(parent, []).append((order, size, move, inside))
+
+    return {
+        "searches": searches,
+        "searched": searched,
+        "nodes": total,
+        "wasted": wasted,
+        "reasons": reasons,
+        "best_index": best_index,
+        "per_ply": per_ply,
+        "largest_wasted": sorted(largest, reverse=True)
+    }
+
+
+def print_report(report, out=sys.stdout):
+    searched = report["searched"] or 1
+    out.write(f"{report['searches']} searches, {report['searched']} nodes searched, {report['nodes']} recorded\n")
+    out.write(f"Nodes in wasted subtrees: {report['wasted']} ({report['wasted'] / searched * 100:.1f}%)\n")
+    out.write("\nNode types:\n")
+    for reason, name in enumerate(REASONS):
+        if report["reasons"][reason]:
+            out.write(f"  {name:<14}{report['reasons'][reason]:>10}\n")
+    for reason in (CUTOFF, ALL):
+        counts = report["best_index"][reason]
+        n = sum(counts.values())
+        if not n:
+            continue
+        label = "cutoff move" if reason == CUTOFF else "best move (all moves searched)"
+        mean = sum((i + 1) * c for i, c in counts.items()) / n  # 1-based, like the list below
+        out.write(f"\nPosition of the {label} in the move order (mean {mean:.2f}):\n")
+        for i in sorted(counts):
+            out.write(f"  {i + 1}. move {counts[i]:>10} ({counts[i] / n * 100:5.1f}%)\n")
+    out.write("\nPer ply: recorded nodes, size of the wasted subtrees directly below\n")
+    for ply in sorted(report["per_ply"]):
+        n, w = report["per_ply"][ply]
+        out.write(f"  ply {ply:>2}: {n:>10} {w:>10}\n")
+    if report["largest_wasted"]:
+        out.write("\nLargest wasted subtrees (size, parent node, ply, move):\n")
+        for size, node, ply, move in report["largest_wasted"]:
+            out.write(f"  {size:>8}  node {node} at ply {ply}, move {move}\n")
+
+
+@contextlib.contextmanager
+def tracing(path, sample=1.0, max_ply=None):
+    """Record the searches in the enclosed code to `path`; no-op when path is None."""
+    if path is None:
+        yield None
+        return
+    recorder = SearchRecorder(path, sample, max_ply)
+    with recorder:
+        yield recorder
+    print(f"Search trace written to {path} ({recorder.nodes} nodes)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record and report search trees")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record", help="record the search of one position")
+    rec.add_argument("--moves", default="", help="position as a move string")
+    rec.add_argument("--depth", type=int, default=ai.DEFAULT_DEPTH)
+    rec.add_argument("--max-ply", type=int)
+    rec.add_argument("--out", default="search_trace.bin")
+    rep = sub.add_parser("report", help="summarize a trace")
+    rep.add_argument("path", nargs="?", default="search_trace.bin")
+    rep.add_argument("--top", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        board, piece = parse_moves(args.moves)
+        with tracing(args.out, max_ply=args.max_ply):
+            move, time_taken, nodes = ai.pick_best_move(board, piece, depth=args.depth)
+        print(f"Best move {move}, {nodes} nodes in {time_taken:.3f}s")
+    else:
+        print_report(analyze_trace(read_trace(args.path), args.top))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
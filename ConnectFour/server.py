@@ -0,0 +1,286 @@
+# server.py
+# Headless asyncio Connect Four server hosting many concurrent human vs AI games
+#
+# Protocol: one JSON object per line in each direction, over TCP on localhost or a unix socket.
+# Every request may carry an "id" (echoed back) and a "deadline_ms" for the whole request.
+#   {"op": "new", "depth": 4, "ai_first": false}  -> {"ok": true, "game": 1, "board": [...], ...}  (depth 1-8)
+#   {"op": "move", "game": 1, "col": 3}           -> human move followed by the AI reply
+#   {"op": "ai", "game": 1}                       -> let the AI move (e.g. after a missed deadline)
+#   {"op": "state", "game": 1}
+#   {"op": "close", "game": 1}
+# Errors come back as {"ok": false, "error": "..."}; "busy" means every search slot stayed taken
+# for SLOT_WAIT, the client should retry later.
+# Game states carry "to_move": "move" is only accepted on the human's turn and "ai" on the AI's.
+# When a move (or new game with ai_first) is applied but the AI cannot answer because it is
+# busy or the deadline passed, the reply is still ok, with "ai_pending": "<reason>" and the
+# game waiting for an "ai" request.
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import board
+from ai import pick_best_move
+
+HUMAN_PIECE = 1
+AI_PIECE = 2
+DEFAULT_DEPTH = 4
+MAX_GAME_DEPTH = 8  # deeper searches could tie up a pool worker for minutes
+MAX_GAMES = 10000
+QUEUE_FACTOR = 4  # AI searches allowed in flight per worker process
+SLOT_WAIT = 0.1  # seconds a request may wait for a free search slot before it is told "busy"
+MAX_INFLIGHT = 64  # requests served at once per connection; further lines are not read until one finishes
+OPS = ("new", "move", "ai", "state", "close")
+
+
+def _ai_search(game_board, piece, depth, time_limit):
+    """Runs in a pool worker: returns (col, time_taken, nodes)."""
+    return pick_best_move(game_board, piece, depth=depth, time_limit=time_limit)
+
+
+class Game:
+    def __init__(self, game_id, depth):
+        self.id = game_id
+        self.depth = depth
+        self.board = board.create_board()
+        self.status = "playing"  # playing, human_wins, ai_wins, draw
+        self.to_move = HUMAN_PIECE
+        self.search = None  # pool future of an AI search whose move has not been played yet
+        self.lock = asyncio.Lock()
+
+    def play(self, col, piece):
+        board.make_move(self.board, col, piece)
+        self.to_move = HUMAN_PIECE if piece == AI_PIECE else AI_PIECE
+        if board.check_win(self.board, piece):
+            self.status = "human_wins" if piece == HUMAN_PIECE else "ai_wins"
+        elif board.check_draw(self.board):
+            self.status = "draw"
+
+    def to_dict(self):
+        return {
+            "game": self.id,
+            "board": self.board,
+            "status": self.status,
+            "to_move": "human" if self.to_move == HUMAN_PIECE else "ai",
+            "valid_moves": board.get_valid_moves(self.board) if self.status == "playing" else []
+        }
+
+
+class RequestError(Exception):
+    """An error reported back to the client as {"ok": false}."""
+
+
+class GameServer:
+    def __init__(self, workers=None, queue_factor=QUEUE_FACTOR, max_games=MAX_GAMES):
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        # bounds the number of searches queued or running in the pool
+        self.slots = asyncio.Semaphore(self.workers * queue_factor)
+        self.max_games = max_games
+        self.games = {}
+        self.ids = itertools.count(1)
+        self.stats = {"requests": 0, "ai_moves": 0, "busy": 0, "timeouts": 0, "failures": 0}
+
+    async def ai_move(self, game, deadline):
+        """
+        Search in the pool and play the AI move, respecting the request deadline.
+        A search that misses the deadline keeps running; the game stays on the AI's turn
+        and the next "ai" request waits for that same search instead of starting another.
+        """
+        loop = asyncio.get_running_loop()
+        remaining = None if deadline is None else deadline - loop.time()
+        if remaining is not None and remaining <= 0:
+            self.stats["timeouts"] += 1
+            raise RequestError("deadline exceeded")
+
+        future = game.search
+        if future is None:
+            try:
+                await asyncio.wait_for(self.slots.acquire(), SLOT_WAIT if remaining is None else min(remaining, SLOT_WAIT))
+            except asyncio.TimeoutError:
+                self.stats["busy"] += 1
+                raise RequestError("busy")
+            # let the search itself stop in time; wait_for below is only a hard guard
+            time_limit = None if deadline is None else max(0.0, (deadline - loop.time()) * 0.8)
+            try:
+                future = loop.run_in_executor(self.pool, _ai_search, game.board, AI_PIECE, game.depth, time_limit)
+            except Exception as e:  # e.g. BrokenProcessPool after a worker died
+                self.slots.release()
+                self.stats["failures"] += 1
+                raise RequestError(f"AI search failed: {e!r}")
+            # the slot is released when the worker finishes, even if the client gave up
+            future.add_done_callback(lambda _: self.slots.release())
+            game.search = future
+        remaining = None if deadline is None else deadline - loop.time()
+        try:
+            col, time_taken, nodes = await asyncio.wait_for(asyncio.shield(future), remaining)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            raise RequestError("deadline exceeded")
+        except Exception as e:
+            # a failed search is not retried by waiting on it again; the next "ai" starts a new one
+            game.search = None
+            self.stats["failures"] += 1
+            raise RequestError(f"AI search failed: {e!r}")
+
+        game.search = None
+        if col is None:
+            self.stats["failures"] += 1
+            raise RequestError("AI search found no move")
+        game.play(col, AI_PIECE)
+        self.stats["ai_moves"] += 1
+        return {"ai_col": col, "ai_time": time_taken, "ai_nodes": nodes}
+
+    async def ai_reply(self, game, deadline):
+        """
+        ai_move for a request that has already changed the game (a human move, a new game).
+        If the AI cannot answer in time the request still succeeds: the reply carries
+        "ai_pending" with the reason and the game stays on the AI's turn.
+        """
+        try:
+            return await self.ai_move(game, deadline)
+        except RequestError as e:
+            return {"ai_pending": str(e)}
+
+    def get_game(self, request):
+        game = self.games.get(request.get("game"))
+        if game is None:
+            raise RequestError("unknown game")
+        return game
+
+    async def handle(self, request):
+        op = request.get("op")
+        if op not in OPS:
+            raise RequestError(f"unknown op {op!r}")
+        deadline = None
+        if request.get("deadline_ms") is not None:
+            deadline = asyncio.get_running_loop().time() + request["deadline_ms"] / 1000
+
+        if op == "new":
+            if len(self.games) >= self.max_games:
+                raise RequestError("too many games")
+            depth = int(request.get("depth", DEFAULT_DEPTH))
+            if not 1 <= depth <= MAX_GAME_DEPTH:
+                raise RequestError(f"depth must be between 1 and {MAX_GAME_DEPTH}")
+            game = Game(next(self.ids), depth)
+            self.games[game.id] = game
+            reply = {}
+            if request.get("ai_first"):
+                game.to_move = AI_PIECE
+                async with game.lock:
+                    reply = await self.ai_reply(game, deadline)
+            reply.update(game.to_dict())
+            return reply
+
+        game = self.get_game(request)
+        if op == "state":
+            return game.to_dict()
+        if op == "close":
+            del self.games[game.id]
+            return {"game": game.id}
+
+        async with game.lock:
+            if game.status != "playing":
+                raise RequestError("game over")
+            reply = {}
+            if op == "move":
+                if game.to_move != HUMAN_PIECE:
+                    raise RequestError("not your turn")
+                col = request.get("col")
+                if col not in board.get_valid_moves(game.board):
+                    raise RequestError("invalid move")
+                game.play(col, HUMAN_PIECE)
+                if game.status == "playing":
+                    reply = await self.ai_reply(game, deadline)
+            else:
+                if game.to_move != AI_PIECE:
+                    raise RequestError("not the AI's turn")
+                reply = await self.ai_move(game, deadline)
+            reply.update(game.to_dict())
+            return reply
+
+    async def respond(self, line, writer):
+        self.stats["requests"] += 1
+        request = {}
+        try:
+            request = json.loads(line)
+            reply = await self.handle(request)
+            reply["ok"] = True
+        except RequestError as e:
+            reply = {"ok": False, "error": str(e)}
+        except (ValueError, TypeError, AttributeError) as e:
+            reply = {"ok": False, "error": f"bad request: {e}"}
+        except Exception as e:
+            # every request gets a reply, or a pipelining client would wait for it forever
+            reply = {"ok": False, "error": f"internal error: {e!r}"}
+        if isinstance(request, dict) and "id" in request:
+            reply["id"] = request["id"]
+        writer.write((json.dumps(reply) + "\n").encode())
+        await writer.drain()
+
+    async def client_connected(self, reader, writer):
+        """
+        Requests on one connection are served concurrently; replies carry the request id.
+        At most MAX_INFLIGHT at a time: past that the connection is not read, so the
+        client is held back by its socket buffer instead of growing the task set.
+        """
+        tasks = set()
+        inflight = asyncio.Semaphore(MAX_INFLIGHT)
+
+        def finished(task):
+            tasks.discard(task)
+            inflight.release()
+
+        try:
+            while True:
+                await inflight.acquire()
+                line = await reader.readline()
+                if not line:
+                    break
+                task = asyncio.create_task(self.respond(line, writer))
+                tasks.add(task)
+                task.add_done_callback(finished)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+
+async def serve(host="127.0.0.1", port=8765, unix_path=None, workers=None):
+    game_server = GameServer(workers=workers)
+    if unix_path:
+        srv = await asyncio.start_unix_server(game_server.client_connected, path=unix_path)
+        where = unix_path
+    else:
+        srv = await asyncio.start_server(game_server.client_connected, host, port)
+        where = f"{host}:{port}"
+    print(f"Connect Four server on {where} with {game_server.workers} AI workers")
+    started = time.time()
+    try:
+        async with srv:
+            await srv.serve_forever()
+    finally:
+        game_server.close()
+        print(f"Served {game_server.stats} in {time.time() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless Connect Four game server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", metavar="PATH", help="listen on a unix socket instead of TCP")
+    parser.add_argument("--workers", type=int, help="AI worker processes (default: CPU count)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.workers))
+    except KeyboardInterrupt:
+        pass
@@ -1,8 +1,14 @@
 # simulation.py
 # Automated simulation and analysis for Connect Four AI (AI vs AI only)
+# iter_matchup / iter_simulation stream one record per game (and optionally per move) as
+# games finish, so long runs can be watched, written out or aggregated in constant memory.
+
+import csv
+import time
 
 from board import create_board, make_move, get_valid_moves, check_win, check_draw
 from ai import pick_best_move
+from streamstats import RunningStats, Summary
 
 NUM_GAMES = 4  # number of games per matchup
 DIFFICULTIES = {
@@ -11,15 +17,22 @@ DIFFICULTIES = {
     4: "Hard (depth=4)"
 }
 
-def simulate_game(ai1_depth, ai2_depth, ai1_starts=True):
+GAME_FIELDS = ["matchup", "game", "ai1_starts", "winner", "moves", "avg_time_ai1", "avg_nodes_ai1",
+               "avg_time_ai2", "avg_nodes_ai2", "time"]
+MOVE_FIELDS = ["matchup", "game", "ply", "player", "col", "time", "nodes"]
+
+
+def iter_game(ai1_depth, ai2_depth, ai1_starts=True, matchup="", game=0):
     """
-    Simulate one game: AI1 vs AI2
-    Returns: winner, avg_time_ai1, avg_nodes_ai1, avg_time_ai2, avg_nodes_ai2
+    Play one game: AI1 (piece 1) vs AI2 (piece 2).
+    Yields a "move" record after every move and a final "game" record.
     """
     board = create_board()
     turn = 0 if ai1_starts else 1  # 0 = AI1, 1 = AI2
     times_ai1, nodes_ai1 = [], []
     times_ai2, nodes_ai2 = [], []
+    start = time.perf_counter()
+    ply = 0
 
     while not check_win(board, 1) and not check_win(board, 2) and not check_draw(board):
         if turn == 0:
@@ -32,6 +45,11 @@ def simulate_game(ai1_depth, ai2_depth, ai1_starts=True):
             make_move(board, col, 2)
             times_ai2.append(time_taken)
             nodes_ai2.append(nodes_expanded)
+        ply += 1
+        yield {
+            "type": "move", "matchup": matchup, "game": game, "ply": ply,
+            "player": "AI1" if turn == 0 else "AI2", "col": col, "time": time_taken, "nodes": nodes_expanded
+        }
         turn = 1 - turn
 
     if check_win(board, 1):
@@ -41,49 +59,123 @@ def simulate_game(ai1_depth, ai2_depth, ai1_starts=True):
     else:
         winner = "Draw"
 
-    avg_time_ai1 = sum(times_ai1)/len(times_ai1) if times_ai1 else 0
-    avg_nodes_ai1 = sum(nodes_ai1)/len(nodes_ai1) if nodes_ai1 else 0
-    avg_time_ai2 = sum(times_ai2)/len(times_ai2) if times_ai2 else 0
-    avg_nodes_ai2 = sum(nodes_ai2)/len(nodes_ai2) if nodes_ai2 else 0
-
-    return winner, avg_time_ai1, avg_nodes_ai1, avg_time_ai2, avg_nodes_ai2
-
-
-def run_simulation():
-    results = []
-    depths = sorted(DIFFICULTIES.keys())
-
-    # AI vs AI: all depth combinations
-    for i, depth1 in enumerate(depths):
-        for j, depth2 in enumerate(depths):
-            matchup_name = f"{DIFFICULTIES[depth1]} vs {DIFFICULTIES[depth2]}"
-            print(f"Simulating {NUM_GAMES} games: {matchup_name}")
-
-            wins = {"AI1": 0, "AI2": 0, "Draw": 0}
-            total_time_ai1 = total_nodes_ai1 = 0
-            total_time_ai2 = total_nodes_ai2 = 0
-
-            for k in range(NUM_GAMES):
-                ai1_starts = (k % 2 == 0)
-                winner, avg_time_ai1, avg_nodes_ai1, avg_time_ai2, avg_nodes_ai2 = simulate_game(
-                    ai1_depth=depth1, ai2_depth=depth2, ai1_starts=ai1_starts
-                )
-                wins[winner] += 1
-                total_time_ai1 += avg_time_ai1
-                total_nodes_ai1 += avg_nodes_ai1
-                total_time_ai2 += avg_time_ai2
-                total_nodes_ai2 += avg_nodes_ai2
-
-            results.append({
-                "matchup": matchup_name,
-                "win_rate_ai1": wins["AI1"]/NUM_GAMES,
-                "win_rate_ai2": wins["AI2"]/NUM_GAMES,
-                "draw_rate": wins["Draw"]/NUM_GAMES,
-                "avg_time_ai1": total_time_ai1/NUM_GAMES,
-                "avg_nodes_ai1": total_nodes_ai1/NUM_GAMES,
-                "avg_time_ai2": total_time_ai2/NUM_GAMES,
-                "avg_nodes_ai2": total_nodes_ai2/NUM_GAMES
-            })
+    yield {
+        "type": "game", "matchup": matchup, "game": game, "ai1_starts": ai1_starts,
+        "winner": winner, "moves": ply,
+        "avg_time_ai1": sum(times_ai1)/len(times_ai1) if times_ai1 else 0,
+        "avg_nodes_ai1": sum(nodes_ai1)/len(nodes_ai1) if nodes_ai1 else 0,
+        "avg_time_ai2": sum(times_ai2)/len(times_ai2) if times_ai2 else 0,
+        "avg_nodes_ai2": sum(nodes_ai2)/len(nodes_ai2) if nodes_ai2 else 0,
+        "time": time.perf_counter() - start
+    }
+
+
+def simulate_game(ai1_depth, ai2_depth, ai1_starts=True):
+    """
+    Simulate one game: AI1 vs AI2
+    Returns: winner, avg_time_ai1, avg_nodes_ai1, avg_time_ai2, avg_nodes_ai2
+    """
+    for record in iter_game(ai1_depth, ai2_depth, ai1_starts):
+        pass
+    return (record["winner"], record["avg_time_ai1"], record["avg_nodes_ai1"],
+            record["avg_time_ai2"], record["avg_nodes_ai2"])
+
+
+def matchup_name(depth1, depth2):
+    return f"{DIFFICULTIES.get(depth1, f'depth={depth1}')} vs {DIFFICULTIES.get(depth2, f'depth={depth2}')}"
+
+
+def iter_matchup(depth1, depth2, num_games=NUM_GAMES, per_move=False):
+    """Records of num_games games between two depths, AI1 starting the even-numbered games."""
+    name = matchup_name(depth1, depth2)
+    for k in range(num_games):
+        for record in iter_game(depth1, depth2, ai1_starts=(k % 2 == 0), matchup=name, game=k):
+            if per_move or record["type"] == "game":
+                yield record
+
+
+def iter_simulation(num_games=NUM_GAMES, depths=None, per_move=False):
+    """Records of every depth combination, one matchup after the other."""
+    depths = sorted(DIFFICULTIES) if depths is None else depths
+    for depth1 in depths:
+        for depth2 in depths:
+            yield from iter_matchup(depth1, depth2, num_games, per_move)
+
+
+class MatchupAggregator:
+    """Win counts, per-game averages and move-time percentiles of one matchup, in constant memory."""
+
+    def __init__(self, name):
+        self.name = name
+        self.wins = {"AI1": 0, "AI2": 0, "Draw": 0}
+        self.games = 0
+        self.game_stats = {field: RunningStats() for field in
+                           ("avg_time_ai1", "avg_nodes_ai1", "avg_time_ai2", "avg_nodes_ai2")}
+        self.move_times = {"AI1": Summary(), "AI2": Summary()}
+
+    def add(self, record):
+        if record["type"] == "move":
+            self.move_times[record["player"]].add(record["time"])
+            return
+        self.games += 1
+        self.wins[record["winner"]] += 1
+        for field, stats in self.game_stats.items():
+            stats.add(record[field])
+
+    def result(self):
+        games = self.games or 1
+        result = {
+            "matchup": self.name,
+            "win_rate_ai1": self.wins["AI1"]/games,
+            "win_rate_ai2": self.wins["AI2"]/games,
+            "draw_rate": self.wins["Draw"]/games,
+        }
+        for field, stats in self.game_stats.items():
+            result[field] = stats.mean
+        for player, summary in self.move_times.items():
+            result[f"move_time_{player.lower()}"] = summary.as_dict()
+        return result
+
+
+def write_csv(records, game_path, move_path=None):
+    """
+    Write records to CSV as they arrive (game records to game_path, move records to
+    move_path if given) and pass them on, so the writer can sit in front of other consumers.
+    """
+    with open(game_path, "w", newline="") as game_file:
+        game_writer = csv.DictWriter(game_file, fieldnames=GAME_FIELDS, extrasaction="ignore")
+        game_writer.writeheader()
+        move_file = open(move_path, "w", newline="") if move_path else None
+        try:
+            move_writer = None
+            if move_file:
+                move_writer = csv.DictWriter(move_file, fieldnames=MOVE_FIELDS, extrasaction="ignore")
+                move_writer.writeheader()
+            for record in records:
+                if record["type"] == "game":
+                    game_writer.writerow(record)
+                    game_file.flush()
+                elif move_writer:
+                    move_writer.writerow(record)
+                yield record
+        finally:
+            if move_file:
+                move_file.close()
+
+
+def run_simulation(num_games=NUM_GAMES, csv_path=None, moves_csv_path=None):
+    # AI vs AI: all depth combinations, aggregated as the records stream in
+    aggregators = {}
+    records = iter_simulation(num_games, per_move=True)
+    if csv_path:
+        records = write_csv(records, csv_path, moves_csv_path)
+    for record in records:
+        aggregator = aggregators.get(record["matchup"])
+        if aggregator is None:
+            aggregator = aggregators[record["matchup"]] = MatchupAggregator(record["matchup"])
+            print(f"Simulating {num_games} games: {aggregator.name}")
+        aggregator.add(record)
+    results = [aggregator.result() for aggregator in aggregators.values()]
 
     # Print summary
     print("\n=== Simulation Summary ===")
@@ -95,8 +187,23 @@ def run_simulation():
         print(f"  Avg time AI1: {r['avg_time_ai1']:.4f}s")
         print(f"  Avg nodes AI1: {r['avg_nodes_ai1']:.1f}")
         print(f"  Avg time AI2: {r['avg_time_ai2']:.4f}s")
-        print(f"  Avg nodes AI2: {r['avg_nodes_ai2']:.1f}\n")
+        print(f"  Avg nodes AI2: {r['avg_nodes_ai2']:.1f}")
+        for player in ("ai1", "ai2"):
+            t = r[f"move_time_{player}"]
+            print(f"  Move time {player.upper()} p50/p90/p99: {t['p50']:.4f}s / {t['p90']:.4f}s / {t['p99']:.4f}s")
+        print()
+    return results
 
 
 if __name__ == "__main__":
-    run_simulation()
+    import argparse
+    parser = argparse.ArgumentParser(description="AI vs AI simulation")
+    parser.add_argument("--games", type=int, default=NUM_GAMES, help="games per matchup")
+    parser.add_argument("--csv", metavar="PATH", help="stream game records to PATH")
+    parser.add_argument("--moves-csv", metavar="PATH", help="also stream move records (needs --csv)")
+    from searchtools import add_search_tool_arguments, search_tools
+    add_search_tool_arguments(parser)
+    args = parser.parse_args()
+
+    with search_tools(args):
+        run_simulation(args.games, args.csv, args.moves_csv)
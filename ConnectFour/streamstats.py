@@ -0,0 +1,119 @@
+# streamstats.py
+# Constant-memory aggregators for streams of results (simulation records, timings, node counts)
+#
+# RunningStats keeps count, mean and variance with Welford's update; P2Quantile estimates a
+# percentile with the P-square algorithm (Jain & Chlamtac), which keeps five markers instead of
+# the samples. Both take one value at a time, so runs of millions of games never store them.
+
+import math
+
+
+class RunningStats:
+    """Count, mean, variance, min and max of a stream of numbers."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (x - self.mean)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    @property
+    def variance(self):
+        """Sample variance (0 for fewer than two values)."""
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stdev(self):
+        return math.sqrt(self.variance)
+
+
+class P2Quantile:
+    """Streaming estimate of the p-quantile (0 < p < 1); exact for the first five values."""
+
+    def __init__(self, p):
+        self.p = p
+        self.heights = []                         # marker heights
+        self.positions = [0, 1, 2, 3, 4]          # actual marker positions
+        self.desired = [0, 2 * p, 4 * p, 2 + 2 * p, 4]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x):
+        q = self.heights
+        if len(q) < 5:
+            q.append(x)
+            q.sort()
+            return
+
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+        n = self.positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # move the middle markers towards their desired positions
+        for i in range(1, 4):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                h = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+                )
+                if not q[i - 1] < h < q[i + 1]:
+                    h = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = h
+                n[i] += d
+
+    def value(self):
+        q = self.heights
+        if not q:
+            return math.nan
+        if len(q) < 5 or self.positions[4] < 5:
+            return q[min(len(q) - 1, int(self.p * len(q)))]
+        return q[2]
+
+
+class Summary:
+    """RunningStats plus a few streaming percentiles for one metric."""
+
+    def __init__(self, percentiles=(0.5, 0.9, 0.99)):
+        self.stats = RunningStats()
+        self.quantiles = {p: P2Quantile(p) for p in percentiles}
+
+    def add(self, x):
+        self.stats.add(x)
+        for quantile in self.quantiles.values():
+            quantile.add(x)
+
+    def as_dict(self):
+        summary = {
+            "count": self.stats.count,
+            "mean": self.stats.mean,
+            "stdev": self.stats.stdev,
+            "min": self.stats.min,
+            "max": self.stats.max
+        }
+        for p, quantile in self.quantiles.items():
+            summary[f"p{p * 100:g}"] = quantile.value()
+        return summary
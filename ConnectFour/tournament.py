@@ -0,0 +1,219 @@
+# tournament.py
+# Engine-vs-engine tournaments that stop as soon as the result is statistically clear
+#
+# Games are played in batches of opening pairs: every random opening is played twice with the
+# engines swapping colors, which cancels most of the opening's bias. After each batch the Elo
+# estimate and a sequential probability ratio test (SPRT) are updated; the run stops when the
+# SPRT accepts H0 (A is no better than elo0) or H1 (A is at least elo1 stronger than B).
+#
+# Engines are keyword arguments for ai.pick_best_move, e.g. depth=4 or time_limit=0.05:
+#   python tournament.py --a depth=4 --b depth=2 --elo0 0 --elo1 50
+
+import argparse
+import math
+import random
+import sys
+
+from board import create_board, make_move, get_valid_moves, check_win, check_draw
+from ai import pick_best_move
+
+DEFAULT_OPENING_PLIES = 4
+DEFAULT_BATCH_PAIRS = 8
+DEFAULT_MAX_GAMES = 2000
+
+
+def make_openings(count, plies=DEFAULT_OPENING_PLIES, seed=0, with_moves=False):
+    """
+    `count` distinct random openings of `plies` moves in which nobody has won yet, as
+    (board, side to move), or (board, side to move, move string) with with_moves.
+    """
+    rng = random.Random(seed)
+    seen = set()
+    openings = []
+    attempts = 0
+    while len(openings) < count and attempts < count * 100:
+        attempts += 1
+        board = create_board()
+        moves = []
+        piece = 1
+        for _ in range(plies):
+            col = rng.choice(get_valid_moves(board))
+            make_move(board, col, piece)
+            moves.append(col)
+            piece = 3 - piece
+        if check_win(board, 1) or check_win(board, 2) or tuple(moves) in seen:
+            continue
+        seen.add(tuple(moves))
+        if with_moves:
+            openings.append((board, piece, "".join(map(str, moves))))
+        else:
+            openings.append((board, piece))
+    return openings
+
+
+def play_game(opening, to_move, engines):
+    """Play out an opening; engines maps piece -> pick_best_move kwargs. Returns 1, 2 or 0 (draw)."""
+    board = [row[:] for row in opening]
+    piece = to_move
+    while True:
+        col, _, _ = pick_best_move(board, piece, **engines[piece])
+        make_move(board, col, piece)
+        if check_win(board, piece):
+            return piece
+        if check_draw(board):
+            return 0
+        piece = 3 - piece
+
+
+def play_pair(job):
+    """Both colors of one opening. Returns A's two game scores (1, 0.5 or 0)."""
+    opening, to_move, engine_a, engine_b = job
+    scores = []
+    for a_piece in (1, 2):
+        engines = {a_piece: engine_a, 3 - a_piece: engine_b}
+        winner = play_game(opening, to_move, engines)
+        scores.append(0.5 if winner == 0 else float(winner == a_piece))
+    return scores
+
+
+def expected_score(elo):
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def elo_from_score(score):
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+
+class MatchStats:
+    """Running W/D/L for engine A, with Elo confidence bounds and the SPRT log-likelihood ratio."""
+
+    def __init__(self):
+        self.wins = self.draws = self.losses = 0
+
+    def add(self, score):
+        if score == 1:
+            self.wins += 1
+        elif score == 0:
+            self.losses += 1
+        else:
+            self.draws += 1
+
+    @property
+    def games(self):
+        return self.wins + self.draws + self.losses
+
+    def mean_and_variance(self):
+        n = self.games
+        mean = (self.wins + 0.5 * self.draws) / n
+        variance = (self.wins * (1 - mean) ** 2 + self.draws * (0.5 - mean) ** 2
+                    + self.losses * mean ** 2) / n
+        return mean, variance
+
+    def elo(self, z=1.96):
+        """(estimate, lower, upper) Elo difference of A over B at the given z-score."""
+        mean, variance = self.mean_and_variance()
+        margin = z * math.sqrt(variance / self.games)
+        return elo_from_score(mean), elo_from_score(mean - margin), elo_from_score(mean + margin)
+
+    def llr(self, elo0, elo1):
+        """Generalized SPRT log-likelihood ratio (normal approximation of the game scores)."""
+        mean, variance = self.mean_and_variance()
+        variance = max(variance, 1e-3)  # all-identical results would otherwise divide by zero
+        s0, s1 = expected_score(elo0), expected_score(elo1)
+        return self.games * (s1 - s0) * (2 * mean - s0 - s1) / (2 * variance)
+
+
+def sprt_bounds(alpha, beta):
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+def run_tournament(engine_a, engine_b, elo0=0.0, elo1=50.0, alpha=0.05, beta=0.05,
+                   batch_pairs=DEFAULT_BATCH_PAIRS, max_games=DEFAULT_MAX_GAMES,
+                   opening_plies=DEFAULT_OPENING_PLIES, workers=1, seed=0):
+    """
+    Play opening pairs in batches until the SPRT decides or max_games is reached.
+    Returns a dict with the verdict ("H1", "H0" or "inconclusive"), W/D/L, Elo and LLR.
+    """
+    lower, upper = sprt_bounds(alpha, beta)
+    openings = make_openings(max_games // 2, opening_plies, seed)
+    stats = MatchStats()
+    verdict = "inconclusive"
+    llr = 0.0
+
+    pool = None
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        for start in range(0, len(openings), batch_pairs):
+            jobs = [(board, to_move, engine_a, engine_b)
+                    for board, to_move in openings[start:start + batch_pairs]]
+            results = pool.map(play_pair, jobs) if pool else map(play_pair, jobs)
+            for pair in results:
+                for score in pair:
+                    stats.add(score)
+
+            llr = stats.llr(elo0, elo1)
+            elo, elo_low, elo_high = stats.elo()
+            print(f"Games {stats.games}: +{stats.wins} ={stats.draws} -{stats.losses} | "
+                  f"Elo {elo:+.1f} [{elo_low:+.1f}, {elo_high:+.1f}] | LLR {llr:.2f} ({lower:.2f}, {upper:.2f})")
+            if llr >= upper:
+                verdict = "H1"
+                break
+            if llr <= lower:
+                verdict = "H0"
+                break
+    finally:
+        if pool:
+            pool.shutdown()
+
+    elo, elo_low, elo_high = stats.elo() if stats.games else (0.0, 0.0, 0.0)
+    return {
+        "verdict": verdict,
+        "games": stats.games,
+        "wins": stats.wins,
+        "draws": stats.draws,
+        "losses": stats.losses,
+        "elo": elo,
+        "elo_low": elo_low,
+        "elo_high": elo_high,
+        "llr": llr
+    }
+
+
+def parse_engine(spec):
+    """'depth=4,time_limit=0.1' -> {'depth': 4, 'time_limit': 0.1}"""
+    engine = {}
+    for part in filter(None, spec.split(",")):
+        key, value = part.split("=")
+        engine[key.strip()] = float(value) if "." in value else int(value)
+    return engine
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SPRT tournament between two engine configurations")
+    parser.add_argument("--a", default="depth=4", help="engine A, e.g. depth=4")
+    parser.add_argument("--b", default="depth=2", help="engine B, e.g. depth=2")
+    parser.add_argument("--elo0", type=float, default=0.0)
+    parser.add_argument("--elo1", type=float, default=50.0)
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+    parser.add_argument("--batch-pairs", type=int, default=DEFAULT_BATCH_PAIRS)
+    parser.add_argument("--max-games", type=int, default=DEFAULT_MAX_GAMES)
+    parser.add_argument("--opening-plies", type=int, default=DEFAULT_OPENING_PLIES)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    engine_a, engine_b = parse_engine(args.a), parse_engine(args.b)
+    print(f"A: {engine_a}  B: {engine_b}  H0: elo <= {args.elo0}  H1: elo >= {args.elo1}")
+    result = run_tournament(engine_a, engine_b, args.elo0, args.elo1, args.alpha, args.beta,
+                            args.batch_pairs, args.max_games, args.opening_plies, args.workers, args.seed)
+    print(f"\nVerdict: {result['verdict']} after {result['games']} games "
+          f"(Elo {result['elo']:+.1f} [{result['elo_low']:+.1f}, {result['elo_high']:+.1f}])")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
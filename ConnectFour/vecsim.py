@@ -0,0 +1,159 @@
+# vecsim.py
+# Vectorized batch simulator: plays thousands of random / one-ply games in lockstep with NumPy
+#
+# Boards are an (N, ROWS * COLS) int8 array, each row a board flattened top row first (the cell
+# numbering of ai.WINDOWS, so windows are gathered with one fancy index; reshape(N, ROWS, COLS)
+# gives the board.py layout), plus an (N, COLS) array of column heights. Each step every
+# unfinished game makes one move, wins and draws are detected for all games at once and
+# finished games are retired.
+# "greedy" reproduces ai.pick_best_move(depth=1) exactly (same scores, same tie-breaking),
+# "random" matches ai.random_move, so results are comparable to simulation.run_simulation.
+
+import argparse
+import time
+
+import numpy as np
+
+from board import ROWS, COLS
+from ai import WINDOWS, CENTER_CELLS, WIN_SCORE, evaluate_window
+
+POLICIES = ("random", "greedy")
+BATCH_SIZE = 4096  # games held in memory at once
+
+WINDOW_INDEX = np.array(WINDOWS, dtype=np.intp)          # (69, 4) flat cell indices
+CENTER_INDEX = np.array(CENTER_CELLS, dtype=np.intp)
+COL_RANGE = np.arange(COLS)
+
+
+def _window_score_table():
+    """evaluate_window for every (own pieces, opponent pieces) count in a window."""
+    table = np.zeros((5, 5), dtype=np.int64)
+    for own in range(5):
+        for opp in range(5 - own):
+            table[own, opp] = evaluate_window([1] * own + [2] * opp + [0] * (4 - own - opp), 1)
+    return table
+
+
+WINDOW_SCORES = _window_score_table()
+
+
+def has_won(flat, pieces):
+    """(n,) bool: does pieces[i] have four in a row on flat board i (n, ROWS*COLS)."""
+    windows = flat[:, WINDOW_INDEX]
+    return (windows == pieces[:, None, None]).all(axis=2).any(axis=1)
+
+
+def random_policy(flat, heights, pieces, rng):
+    """Uniformly random valid column for every game."""
+    noise = rng.random((len(flat), COLS))
+    noise[heights >= ROWS] = -1.0
+    return noise.argmax(axis=1)
+
+
+def greedy_policy(flat, heights, pieces, rng):
+    """The depth-1 minimax move for every game: the child with the best score_position."""
+    n = len(flat)
+    valid = heights < ROWS
+    rows = ROWS - 1 - np.minimum(heights, ROWS - 1)
+    target = rows * COLS + COL_RANGE                          # (n, COLS) cell each move lands in
+
+    children = np.repeat(flat[:, None, :], COLS, axis=1)      # (n, COLS, cells)
+    rows_idx = np.arange(n)[:, None]
+    children[rows_idx, COL_RANGE[None, :], target] = np.where(valid, pieces[:, None], 0)
+
+    windows = children[:, :, WINDOW_INDEX]                    # (n, COLS, 69, 4)
+    own = (windows == pieces[:, None, None, None]).sum(axis=3)
+    opp = (windows == (3 - pieces)[:, None, None, None]).sum(axis=3)
+    scores = WINDOW_SCORES[own, opp].sum(axis=2)
+    scores += 6 * (children[:, :, CENTER_INDEX] == pieces[:, None, None]).sum(axis=2)
+
+    wins = (own == 4).any(axis=2)
+    full = (heights.sum(axis=1) + 1 == ROWS * COLS)[:, None]
+    values = np.where(wins, WIN_SCORE - 6, np.where(full, 0, scores)).astype(np.float64)
+    values[~valid] = -np.inf
+    return values.argmax(axis=1)  # first maximum, like minimax's strict ">"
+
+
+POLICY_FUNCS = {"random": random_policy, "greedy": greedy_policy}
+
+
+def simulate_batch(n, policy1, policy2, rng, first_game=0):
+    """
+    Play n games, AI1 (piece 1) against AI2 (piece 2), AI1 starting the even-numbered games.
+    Returns (winners, move_counts): winner 1, 2 or 0 for a draw.
+    """
+    policies = {1: POLICY_FUNCS[policy1], 2: POLICY_FUNCS[policy2]}
+    flat = np.zeros((n, ROWS * COLS), dtype=np.int8)
+    heights = np.zeros((n, COLS), dtype=np.int8)
+    ids = np.arange(n)
+    pieces = np.where((ids + first_game) % 2 == 0, 1, 2).astype(np.int8)
+    winners = np.zeros(n, dtype=np.int8)
+    moves = np.zeros(n, dtype=np.int16)
+
+    ply = 0
+    while len(ids):
+        cols = np.empty(len(ids), dtype=np.intp)
+        for piece, policy in policies.items():
+            mask = pieces == piece
+            if mask.any():
+                cols[mask] = policy(flat[mask], heights[mask], pieces[mask], rng)
+
+        live = np.arange(len(ids))
+        rows = ROWS - 1 - heights[live, cols]
+        flat[live, rows * COLS + cols] = pieces
+        heights[live, cols] += 1
+        ply += 1
+
+        won = has_won(flat, pieces)
+        drawn = ~won & (heights >= ROWS).all(axis=1)
+        done = won | drawn
+        if done.any():
+            winners[ids[won]] = pieces[won]
+            moves[ids[done]] = ply
+            keep = ~done
+            flat, heights, ids, pieces = flat[keep], heights[keep], ids[keep], pieces[keep]
+        pieces = 3 - pieces
+
+    return winners, moves
+
+
+def run_batch_simulation(num_games, policy1="random", policy2="random", seed=0, batch_size=BATCH_SIZE):
+    """Win/draw statistics in the same shape as simulation.run_simulation's results."""
+    rng = np.random.default_rng(seed)
+    counts = {0: 0, 1: 0, 2: 0}
+    total_moves = 0
+    start = time.perf_counter()
+    for first in range(0, num_games, batch_size):
+        n = min(batch_size, num_games - first)
+        winners, moves = simulate_batch(n, policy1, policy2, rng, first_game=first)
+        for result, count in zip(*np.unique(winners, return_counts=True)):
+            counts[int(result)] += int(count)
+        total_moves += int(moves.sum())
+    elapsed = time.perf_counter() - start
+    return {
+        "matchup": f"{policy1} vs {policy2}",
+        "games": num_games,
+        "win_rate_ai1": counts[1] / num_games,
+        "win_rate_ai2": counts[2] / num_games,
+        "draw_rate": counts[0] / num_games,
+        "avg_moves": total_moves / num_games,
+        "games_per_sec": num_games / elapsed if elapsed else 0
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vectorized Connect Four batch simulator")
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    print("\n=== Batch Simulation Summary ===")
+    for p1 in POLICIES:
+        for p2 in POLICIES:
+            r = run_batch_simulation(args.games, p1, p2, args.seed, args.batch_size)
+            print(f"{r['matchup']} ({r['games']} games, {r['games_per_sec']:.0f} games/s):")
+            print(f"  Win rate AI1: {r['win_rate_ai1']*100:.1f}%")
+            print(f"  Win rate AI2: {r['win_rate_ai2']*100:.1f}%")
+            print(f"  Draw rate: {r['draw_rate']*100:.1f}%")
+            print(f"  Avg moves: {r['avg_moves']:.1f}\n")